@@ -1,8 +1,18 @@
+import os
 import tkinter as tk
 from tkinter import filedialog, ttk
 from PIL import Image, ImageTk
 import cv2
-import numpy as np
+import export
+import image_ops
+import lazy
+import memo
+import previews
+import tiled
+from history import History
+from pyramid import Pyramid
+from tasks import TaskRunner
+from timing import Timings
 
 # -------------------------
 # A simple premium image editor
@@ -20,6 +30,22 @@ def apply_style(root):
     style.configure('Horizontal.TScale', sliderlength=20)
     style.configure('TSeparator', background='#4a4a4a')
 
+# Slider label, operation, range and the value that leaves the image alone
+ADJUSTERS = [
+    ('Blur size', 'blur', 1, 31, 1),
+    ('Sharpen', 'sharpen', 0, 3, 0),
+    ('Brightness', 'bright', -100, 100, 0),
+]
+# Arrow keys nudge a slider one press at a time: apply once they pause this long (ms)
+ADJUST_KEY_DELAY = 500
+
+def adjust_step(op, v):
+    if op == 'blur':
+        return image_ops.step('blur', ksize=int(v) | 1), f'Blur {int(v) | 1}px'
+    if op == 'sharpen':
+        return image_ops.step('sharpen', amount=round(v, 2)), f'Sharpen ×{v:.2f}'
+    return image_ops.step('bright', delta=int(v)), f'Brightness {int(v):+d}'
+
 class ImageEditor(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -29,32 +55,66 @@ class ImageEditor(tk.Tk):
         apply_style(self)
 
         # Image data
-        self.original = None
+        self.path = None
         self.current = None
-        self.display = None
+        self.load_id = 0     # bumped per load; with the recipe it names the frame's content
+        # Cheap edits are kept fused and unapplied until display or save
+        self.pending = lazy.IDENTITY
         self.photo = None
+        # Stand-in drawn over the canvas while a new image loads
+        self.preview_photo = None
+        self.preview_id = None
+
+        # Zoomed display: pyramid of the current image, only the viewport is drawn
+        self.pyramid = Pyramid()
+        self.scale = 1.0
+        self.image_id = None
+        self._draw_job = None
+
+        # Adjustment sliders: previewed on the display, applied once on release
+        self.adjusters = {}
+        self.preview_step = None
+        self._committing = None
+        self._commit_job = None
 
         # Crop rectangle
         self.start = None
         self.rect_id = None
 
-        # Undo/redo
-        self.history = []
-        self.history_idx = -1
-        self.max_hist = 20
+        # Encoder settings used by Save and Export
+        self.export_opts = export.ExportOptions()
+
+        # Results by input content, for the edits and for the slider previews
+        self.results = memo.ResultCache(budget=256 * 2**20)
+        # Undo/redo, bounded by memory (history.DEFAULT_BUDGET) rather than by step count;
+        # frames shared with the cache are taken back from it before tiles are swapped in
+        self.history = History(own=self.results.release)
+
+        # Per-operation latency in the status bar (View menu or EDITOR_TIMINGS=1)
+        self.timings = Timings(enabled=os.environ.get('EDITOR_TIMINGS') == '1')
 
         self._build_ui()
         self._bind_keys()
 
+        # Loading, saving and edits run in order on a worker thread
+        self.tasks = TaskRunner(self, lambda msg: self.status.config(text=msg), timings=self.timings)
+
     def _build_ui(self):
         # Menu bar
         menu = tk.Menu(self)
         fm = tk.Menu(menu, tearoff=0)
         fm.add_command(label='Load  Ctrl+O', command=self.load_image)
         fm.add_command(label='Save  Ctrl+S', command=self.save_image)
+        fm.add_command(label='Export…', command=self.export_dialog)
+        fm.add_command(label='Save Recipe…', command=self.save_recipe)
         fm.add_separator()
         fm.add_command(label='Exit', command=self.quit)
         menu.add_cascade(label='File', menu=fm)
+        vm = tk.Menu(menu, tearoff=0)
+        self.timings_var = tk.BooleanVar(value=self.timings.enabled)
+        vm.add_checkbutton(label='Show Timings', variable=self.timings_var, command=self.toggle_timings)
+        vm.add_command(label='Dump Trace…', command=self.dump_trace)
+        menu.add_cascade(label='View', menu=vm)
         self.config(menu=menu)
 
         # Main layout: controls | canvas
@@ -82,7 +142,8 @@ class ImageEditor(tk.Tk):
             ('🌑 Invert', self.invert, 'Ctrl+I'),
             ('✜ Sharpen', self.sharpen, 'Ctrl+E'),
             ('🔆 Brighten', self.brighten, 'Ctrl++'),
-            ('🔅 Darken', self.darken, 'Ctrl+-')
+            ('🔅 Darken', self.darken, 'Ctrl+-'),
+            ('✖ Cancel', self.cancel, 'Esc')
         ]
         for txt, cmd, hint in ops:
             ttk.Button(ctrl, text=f'{txt} ({hint})', command=cmd).pack(fill=tk.X, pady=3)
@@ -98,13 +159,33 @@ class ImageEditor(tk.Tk):
         self.spin = ttk.Spinbox(zf, from_=10, to=200, textvariable=self.zoom_var, width=5, command=self.on_spin)
         self.spin.pack(side=tk.LEFT, padx=(5,0))
 
+        # Adjustments
+        ttk.Label(ctrl, text='Adjust').pack(pady=(20,5))
+        for label, op, lo, hi, neutral in ADJUSTERS:
+            ttk.Label(ctrl, text=label).pack(anchor=tk.W)
+            s = ttk.Scale(ctrl, from_=lo, to=hi, orient=tk.HORIZONTAL,
+                          command=lambda v, op=op: self.on_adjust(op, float(v)))
+            s.set(neutral)
+            s.pack(fill=tk.X)
+            s.bind('<ButtonRelease-1>', lambda e, op=op: self.commit_adjust(op))
+            s.bind('<KeyRelease>', lambda e, op=op: self._commit_later(op))
+            s.bind('<Return>', lambda e, op=op: self.commit_adjust(op))
+            s.bind('<FocusOut>', lambda e, op=op: self.commit_adjust(op))
+            self.adjusters[op] = (s, neutral)
+
         # Status bar
         self.status = ttk.Label(self, text='Ready', anchor=tk.W)
         self.status.pack(side=tk.BOTTOM, fill=tk.X)
 
         # Canvas
         self.canvas = tk.Canvas(canvas_frame, bg='#1e1e1e', highlightthickness=0)
+        xs = ttk.Scrollbar(canvas_frame, orient=tk.HORIZONTAL, command=self.on_scroll_x)
+        ys = ttk.Scrollbar(canvas_frame, orient=tk.VERTICAL, command=self.on_scroll_y)
+        self.canvas.config(xscrollcommand=xs.set, yscrollcommand=ys.set)
+        xs.pack(side=tk.BOTTOM, fill=tk.X)
+        ys.pack(side=tk.RIGHT, fill=tk.Y)
         self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.canvas.bind('<Configure>', lambda e: self._schedule_draw())
         self.canvas.bind('<ButtonPress-1>', self.on_press)
         self.canvas.bind('<B1-Motion>', self.on_drag)
         self.canvas.bind('<ButtonRelease-1>', self.on_release)
@@ -123,142 +204,369 @@ class ImageEditor(tk.Tk):
             '<Control-i>': self.invert,
             '<Control-e>': self.sharpen,
             '<Control-plus>': self.brighten,
-            '<Control-minus>': self.darken
+            '<Control-minus>': self.darken,
+            '<Escape>': self.cancel
         }
         for seq, cmd in keys.items():
             self.bind(seq, lambda e, f=cmd: f())
 
-    def record_state(self):
-        self.history = self.history[:self.history_idx+1]
-        self.history.append(self.current.copy())
-        if len(self.history) > self.max_hist:
-            self.history.pop(0)
-        else:
-            self.history_idx += 1
+    def save_recipe(self):
+        if self.current is None: return
+        path = filedialog.asksaveasfilename(defaultextension='.json',filetypes=[('Recipe','*.json')])
+        if not path: return
+        steps = self.history.recipe
+        image_ops.save_recipe(path, steps)
+        self.status.config(text=f'Saved recipe ({len(steps)} steps) {path.split("/")[-1]}')
 
+    def toggle_timings(self):
+        self.timings.enabled = self.timings_var.get()
+        self.status.config(text='Timings on' if self.timings.enabled else 'Timings off')
+
+    def dump_trace(self):
+        path = filedialog.asksaveasfilename(defaultextension='.json',filetypes=[('Chrome trace','*.json')])
+        if not path: return
+        n = self.timings.dump(path)
+        lost = f', {self.timings.dropped} older ones dropped' if self.timings.dropped else ''
+        self.status.config(text=f'Wrote {n} events to {path.split("/")[-1]}{lost}')
+
+    def _status(self, msg, *spans):
+        if self.timings.enabled:
+            msg = f'{msg}   ⏱ {self.timings.describe(*spans, "render", "photo")}'
+        self.status.config(text=msg)
+
+    # Undo/redo swap tiles into the shown frame in place: queued like any job,
+    # but run on the Tk thread, which is the one drawing from that frame
     def undo(self):
-        if self.history_idx > 0:
-            self.history_idx -= 1
-            self.current = self.history[self.history_idx].copy()
-            self.reset_view()
-            self.status.config(text='Undo')
+        self.tasks.submit(None, lambda _: self._set_current(self.history.undo(self.current, self.pending), 'Undo'), 'Undo')
 
     def redo(self):
-        if self.history_idx < len(self.history)-1:
-            self.history_idx += 1
-            self.current = self.history[self.history_idx].copy()
-            self.reset_view()
-            self.status.config(text='Redo')
+        self.tasks.submit(None, lambda _: self._set_current(self.history.redo(self.current, self.pending), 'Redo'), 'Redo')
+
+    def cancel(self):
+        self.tasks.cancel()
 
     # Image operations
-    def rotate_90(self):     self._apply(lambda img: cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE), 'Rotated 90°')
-    def flip_h(self):        self._apply(lambda img: cv2.flip(img,1), 'Flipped Horizontal')
-    def flip_v(self):        self._apply(lambda img: cv2.flip(img,0), 'Flipped Vertical')
-    def blur(self):          self._apply(lambda img: cv2.GaussianBlur(img,(7,7),0), 'Blur')
-    def grayscale(self):     self._apply(lambda img: cv2.cvtColor(cv2.cvtColor(img, cv2.COLOR_RGB2GRAY), cv2.COLOR_GRAY2RGB), 'Grayscale')
-    def invert(self):        self._apply(lambda img: cv2.bitwise_not(img), 'Inverted')
-    def sharpen(self):       self._apply(lambda img: cv2.filter2D(img,-1,np.array([[0,-1,0],[-1,5,-1],[0,-1,0]])), 'Sharpened')
-    def brighten(self):      self._bright(30, 'Brightened')
-    def darken(self):        self._bright(-30, 'Darkened')
-
-    def _bright(self, delta, msg):
-        f = lambda img: np.clip(img.astype(int)+delta,0,255).astype(np.uint8)
-        self._apply(f, msg)
-
-    def _apply(self, func, msg):
+    def rotate_90(self):     self._apply(image_ops.step('rotate_90'), 'Rotated 90°')
+    def flip_h(self):        self._apply(image_ops.step('flip_h'), 'Flipped Horizontal')
+    def flip_v(self):        self._apply(image_ops.step('flip_v'), 'Flipped Vertical')
+    def blur(self):          self._apply(image_ops.step('blur'), 'Blur')
+    def grayscale(self):     self._apply(image_ops.step('grayscale'), 'Grayscale')
+    def invert(self):        self._apply(image_ops.step('invert'), 'Inverted')
+    def sharpen(self):       self._apply(image_ops.step('sharpen'), 'Sharpened')
+    def brighten(self):      self._apply(image_ops.step('brighten'), 'Brightened')
+    def darken(self):        self._apply(image_ops.step('darken'), 'Darkened')
+
+    # Adjustment sliders
+    def on_adjust(self, op, v):
         if self.current is None: return
-        self.current = func(self.current)
-        self.record_state()
+        s, neutral = self.adjusters[op]
+        step, msg = adjust_step(op, v)
+        # Only the display proxy is filtered while dragging; draws are coalesced
+        self.preview_step = None if step == adjust_step(op, neutral)[0] else step
+        self._schedule_draw()
+        self.status.config(text=f'{msg} (release to apply)')
+
+    def _commit_later(self, op):
+        if self._commit_job is not None:
+            self.after_cancel(self._commit_job)
+        self._commit_job = self.after(ADJUST_KEY_DELAY, lambda: self.commit_adjust(op))
+
+    def commit_adjust(self, op):
+        if self._commit_job is not None:
+            self.after_cancel(self._commit_job)
+            self._commit_job = None
+        step = self.preview_step
+        if step is None or step['op'] != op: return
+        # Release, Return and FocusOut can all follow one edit: only the first commits
+        # it, the preview stays on screen until the job is done
+        self.preview_step, self._committing = None, step
+        s, neutral = self.adjusters[op]
+        def finished():
+            if self._committing is step:
+                self._committing = None
+            s.set(neutral)
+        self._apply(step, adjust_step(op, s.get())[1], then=finished)
+
+    def _apply(self, step, msg, then=None):
+        """Queue step on the current image; `then` runs on the Tk thread before the
+        result is shown, or on its own if the job fails or is cancelled"""
+        # Runs on the worker thread after every job queued before it
+        def work(task):
+            if self.current is None: return None
+            before, pending = self.current, self.pending
+            fused = pending.add(step)
+            if fused is not None:
+                # No pixels touched, the step only shows up when drawn or saved
+                self.history.push(before, before, step, pending)
+                return before, fused, False
+            # Repeated or reverted edits come from the cache, keyed by the load and
+            # the steps since (pending ones included) instead of by hashing the
+            # frame; big frames are processed tile by tile, reporting progress
+            recipe = self.history.recipe
+            flat = before if pending.is_identity else self.results.compute(
+                (self.load_id, memo.chain_key(recipe)),
+                lambda: tiled.apply_pending(before, pending, task.progress))
+            task.check()
+            after = self.results.compute(
+                (self.load_id, memo.chain_key(recipe + [step])),
+                lambda: tiled.apply_step(flat, step, task.progress))
+            task.check()
+            if flat is not before:
+                flat = self.history.push(before, flat, None, pending)
+            return self.history.push(flat, after, step), lazy.IDENTITY, True
+        def done(res):
+            if then: then()
+            self._set_current(res, msg)
+        # Runs again after done (it must be harmless twice), and alone on failure or Esc
+        self.tasks.submit(work, done, msg, always=then)
+
+    def _set_current(self, res, msg):
+        if res is None: return
+        self.current, self.pending, dirty = res
+        if dirty:
+            # Undo/redo of tile entries only rebuilds the pyramid where tiles changed
+            self.pyramid.set(self.current, None if dirty is True else dirty)
         self.reset_view()
-        self._draw(self.current)
-        self.status.config(text=msg)
+        self._draw()
+        self._status(msg, msg)
+
+    def image_size(self):
+        """(height, width) of the edited image, pending edits included"""
+        return self.pending.shape(self.current.shape)
 
     def load_image(self):
-        path = filedialog.askopenfilename(filetypes=[('Images','*.png;*.jpg;*.bmp')])
+        path = filedialog.askopenfilename(filetypes=[('Images','*.png;*.jpg;*.bmp;*.npy')])
         if not path: return
-        img = cv2.imread(path)
-        if img is None: return
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.original = img.copy()
-        self.current = img.copy()
-        self.history = []
-        self.history_idx = -1
-        self.record_state()
-        self.fit_image()
-        self.status.config(text=f'Loaded {path.split("/")[-1]}')
+        name = path.split("/")[-1]
+        view = self._canvas_size()
+        def work(task):
+            try:
+                shape = previews.image_size(path)
+            except OSError:
+                raise ValueError('not an image')
+            # Something to look at first: cached preview or a reduced JPEG decode
+            pre, hit = previews.preview(path, shape)
+            if pre is not None:
+                task.post(self._show_preview, pre, shape, name)
+            task.progress(0.1)
+            # The decoded frame becomes the current image as is, history can walk back to it
+            img = tiled.open_image(path)
+            if img is None: raise ValueError('not an image')
+            task.progress(0.7)
+            # Build the pyramid levels the fitted view needs off the UI thread too
+            pyramid = Pyramid(img)
+            pyramid.pick(self._fit_scale(shape, *view))
+            if not hit:
+                previews.store(path, pyramid.levels[pyramid.pick(previews.PREVIEW_SIDE/max(shape))])
+            return img, pyramid
+        def done(res):
+            self.current, self.pyramid = res
+            self.path = path
+            self.load_id += 1
+            self.pending = lazy.IDENTITY
+            self.preview_step = self._committing = None
+            self.history.reset()
+            self.fit_image()
+            self._status(f'Loaded {name}', f'Loading {name}')
+        self.tasks.submit(work, done, f'Loading {name}', always=self._end_preview)
 
     def save_image(self):
         if self.current is None: return
-        path = filedialog.asksaveasfilename(defaultextension='.png',filetypes=[('PNG','*.png'),('JPEG','*.jpg')])
+        path = filedialog.asksaveasfilename(defaultextension='.png',filetypes=[('PNG','*.png'),('JPEG','*.jpg'),('NumPy scan','*.npy')])
         if not path: return
-        scale = self.zoom_var.get()/100
-        h,w = self.current.shape[:2]
-        out = cv2.resize(self.current,(int(w*scale),int(h*scale)))
-        out = cv2.cvtColor(out,cv2.COLOR_RGB2BGR)
-        cv2.imwrite(path,out)
-        self.status.config(text=f'Saved {path.split("/")[-1]}')
-
-    def fit_image(self):
+        self._export(path, [self.zoom_var.get()/100])
+
+    def _export(self, path, sizes):
+        name = path.split("/")[-1]
+        opts = self.export_opts
+        def work(task):
+            img = tiled.apply_pending(self.current, self.pending)
+            task.check()
+            if path.lower().endswith('.npy'):
+                h,w = img.shape[:2]
+                if sizes[0] != 1:
+                    img = cv2.resize(img,(int(w*sizes[0]),int(h*sizes[0])))
+                if not tiled.save_image(path, img, task.progress): raise IOError('could not write file')
+                return [path]
+            return export.export(img, path, sizes, opts, task.progress)
+        def done(paths):
+            extra = f' (+{len(paths)-1} sizes)' if len(paths) > 1 else ''
+            self._status(f'Saved {name}{extra}', f'Saving {name}')
+        self.tasks.submit(work, done, f'Saving {name}')
+
+    def export_dialog(self):
+        """Encoder settings and output sizes, then the file to write"""
+        if self.current is None: return
+        o = self.export_opts
+        win = tk.Toplevel(self)
+        win.title('Export')
+        win.configure(bg='#2e2e2e')
+        win.transient(self)
+        frm = ttk.Frame(win, padding=10)
+        frm.pack(fill=tk.BOTH, expand=True)
+        quality = tk.IntVar(value=o.jpeg_quality)
+        progressive = tk.BooleanVar(value=o.progressive)
+        optimize = tk.BooleanVar(value=o.optimize)
+        png_level = tk.IntVar(value=o.png_compression)
+        sizes = tk.StringVar(value=f'{self.zoom_var.get()}%')
+        ttk.Label(frm, text='JPEG quality').grid(row=0, column=0, sticky=tk.W, pady=3)
+        ttk.Spinbox(frm, from_=10, to=100, textvariable=quality, width=6).grid(row=0, column=1, sticky=tk.W)
+        ttk.Checkbutton(frm, text='Progressive JPEG', variable=progressive).grid(row=1, column=0, columnspan=2, sticky=tk.W)
+        ttk.Checkbutton(frm, text='Optimize JPEG (slower)', variable=optimize).grid(row=2, column=0, columnspan=2, sticky=tk.W)
+        ttk.Label(frm, text='PNG compression (0-9)').grid(row=3, column=0, sticky=tk.W, pady=3)
+        ttk.Spinbox(frm, from_=0, to=9, textvariable=png_level, width=6).grid(row=3, column=1, sticky=tk.W)
+        ttk.Label(frm, text='Sizes, e.g. 100%, 50%, 1920px').grid(row=4, column=0, sticky=tk.W, pady=3)
+        ttk.Entry(frm, textvariable=sizes, width=24).grid(row=4, column=1, sticky=tk.W)
+        def ok():
+            try:
+                wanted = export.parse_sizes(sizes.get())
+                self.export_opts = export.ExportOptions(quality.get(), progressive.get(), optimize.get(), png_level.get())
+            except (ValueError, tk.TclError) as e:
+                self.status.config(text=str(e))
+                return
+            if not wanted: return
+            win.destroy()
+            path = filedialog.asksaveasfilename(defaultextension='.jpg',filetypes=[('JPEG','*.jpg'),('PNG','*.png')])
+            if path: self._export(path, wanted)
+        ttk.Button(frm, text='Export…', command=ok).grid(row=5, column=0, columnspan=2, sticky=tk.EW, pady=(10,0))
+
+    def _show_preview(self, img, shape, name):
+        """Stand-in shown, fitted to the canvas, while the full image decodes;
+        the current image stays as it is until the new one replaces it"""
+        h,w = shape
+        sc = self._fit_scale(shape, *self._canvas_size())
+        img = cv2.resize(img, (max(1,int(w*sc)), max(1,int(h*sc))), interpolation=cv2.INTER_AREA)
+        self.preview_photo = ImageTk.PhotoImage(Image.fromarray(img))
+        if self.preview_id is not None:
+            self.canvas.delete(self.preview_id)
+        if self.image_id is not None:
+            self.canvas.itemconfig(self.image_id, state=tk.HIDDEN)
+        self.preview_id = self.canvas.create_image(0,0,anchor=tk.NW,image=self.preview_photo)
+        self.canvas.config(scrollregion=(0,0,img.shape[1],img.shape[0]))
+        self.status.config(text=f'Loading {name}… (preview)')
+
+    def _end_preview(self):
+        """Drop the loading stand-in: the new image, or the old one if loading failed or was cancelled"""
+        if self.preview_id is None: return
+        self.canvas.delete(self.preview_id)
+        self.preview_id = self.preview_photo = None
+        if self.image_id is not None:
+            self.canvas.itemconfig(self.image_id, state=tk.NORMAL)
+        if self.current is None:
+            self.canvas.config(scrollregion=(0,0,0,0))
+        self._draw()
+
+    def _canvas_size(self):
         self.update_idletasks()
         cw = self.canvas.winfo_width() or self.winfo_width()-220
         ch = self.canvas.winfo_height() or self.winfo_height()-80
-        h,w = self.current.shape[:2]
-        sc = min(cw/w, ch/h, 1)
+        return cw, ch
+
+    @staticmethod
+    def _fit_scale(shape, cw, ch):
+        h,w = shape[:2]
+        return min(cw/w, ch/h, 1)
+
+    def fit_image(self):
+        sc = self._fit_scale(self.image_size(), *self._canvas_size())
         zv = int(sc*100)
         self.zoom_var.set(zv)
         self.slider.set(zv)
-        img = cv2.resize(self.current,(int(w*sc),int(h*sc)))
-        self._draw(img)
+        self.scale = sc
+        self._draw()
 
     def reset_view(self):
         self.zoom_var.set(100)
         self.slider.set(100)
+        self.scale = 1.0
 
-    def _draw(self, img):
-        self.canvas.delete('all')
-        self.display = img
+    def _schedule_draw(self):
+        # Slider and scroll events arrive faster than frames, draw at most once per frame
+        if self._draw_job is None:
+            self._draw_job = self.after(16, self._draw)
+
+    def _draw(self):
+        if self._draw_job is not None:
+            self.after_cancel(self._draw_job)
+            self._draw_job = None
+        if self.current is None: return
+        h,w = self.image_size()
+        zw,zh = max(1,int(w*self.scale)), max(1,int(h*self.scale))
+        self.canvas.config(scrollregion=(0,0,zw,zh))
+        cw,ch = self.canvas.winfo_width(), self.canvas.winfo_height()
+        vw,vh = max(1,min(cw,zw)), max(1,min(ch,zh))
+        x0 = max(0, min(int(self.canvas.canvasx(0)), zw-vw))
+        y0 = max(0, min(int(self.canvas.canvasy(0)), zh-vh))
+        with self.timings.span('render'):
+            img = self.pending.view(self.pyramid, self.scale, x0, y0, vw, vh)
+            shown = self.preview_step or self._committing
+            if shown is not None:
+                s = image_ops.at_scale(shown, self.scale)
+                src = img
+                img = self.results.compute((memo.digest(src), memo.step_key(s)),
+                                           lambda: image_ops.apply_step(src, s))
+        self._put_photo(img, x0, y0)
+
+    def _put_photo(self, img, x0, y0):
         h,w = img.shape[:2]
-        pil = Image.fromarray(img)
-        self.photo = ImageTk.PhotoImage(pil)
-        self.canvas.config(scrollregion=(0,0,w,h))
-        self.canvas.create_image(0,0,anchor=tk.NW,image=self.photo)
+        with self.timings.span('photo'):
+            pil = Image.fromarray(img)
+            # Reuse the PhotoImage and canvas item while the viewport size stays the same
+            if self.photo is not None and (self.photo.width(), self.photo.height()) == (w, h):
+                self.photo.paste(pil)
+            else:
+                self.photo = ImageTk.PhotoImage(pil)
+        if self.image_id is None:
+            self.image_id = self.canvas.create_image(x0,y0,anchor=tk.NW,image=self.photo)
+        else:
+            self.canvas.itemconfig(self.image_id, image=self.photo)
+            self.canvas.coords(self.image_id, x0, y0)
+            self.canvas.tag_lower(self.image_id)
+
+    def on_scroll_x(self, *args):
+        self.canvas.xview(*args)
+        self._schedule_draw()
+
+    def on_scroll_y(self, *args):
+        self.canvas.yview(*args)
+        self._schedule_draw()
 
     # Crop handlers
     def on_press(self, e):
-        if self.current is None: return
-        self.start = (e.x,e.y)
+        if self.current is None or self.preview_id is not None: return
+        # Canvas coordinates, i.e. pixels of the zoomed image
+        self.start = (self.canvas.canvasx(e.x),self.canvas.canvasy(e.y))
         if self.rect_id: self.canvas.delete(self.rect_id)
 
     def on_drag(self, e):
         if not self.start: return
         if self.rect_id: self.canvas.delete(self.rect_id)
-        self.rect_id = self.canvas.create_rectangle(*self.start, e.x, e.y, outline='#ffd700', width=2)
+        x,y = self.canvas.canvasx(e.x),self.canvas.canvasy(e.y)
+        self.rect_id = self.canvas.create_rectangle(*self.start, x, y, outline='#ffd700', width=2)
 
     def on_release(self, e):
         if not self.start: return
-        x0,y0 = self.start; x1,y1 = e.x,e.y
-        dh,dw = self.display.shape[:2]; sh,sw = self.current.shape[:2]
-        x0,x1 = sorted((max(0,x0),min(dw,x1)))
-        y0,y1 = sorted((max(0,y0),min(dh,y1)))
-        fx,fy = sw/dw, sh/dh
-        cx0,cy0 = int(x0*fx),int(y0*fy)
-        cx1,cy1 = int(x1*fx),int(y1*fy)
-        self.current = self.current[cy0:cy1,cx0:cx1]
-        self.record_state()
-        self.reset_view()
-        self._draw(self.current)
-        self.status.config(text=f'Cropped {cx1-cx0}×{cy1-cy0}')
+        x0,y0 = self.start; x1,y1 = self.canvas.canvasx(e.x),self.canvas.canvasy(e.y)
+        if self.rect_id: self.canvas.delete(self.rect_id)
+        self.rect_id = None
+        sh,sw = self.image_size()
+        x0,x1 = sorted((x0,x1))
+        y0,y1 = sorted((y0,y1))
+        cx0,cy0 = max(0,int(x0/self.scale)),max(0,int(y0/self.scale))
+        cx1,cy1 = min(sw,int(x1/self.scale)),min(sh,int(y1/self.scale))
         self.start = None
+        if cx1 <= cx0 or cy1 <= cy0: return
+        step = image_ops.step('crop', box=[cx0/sw, cy0/sh, cx1/sw, cy1/sh])
+        self._apply(step, f'Cropped {cx1-cx0}×{cy1-cy0}')
 
     # Zoom handlers
     def on_zoom(self, val):
         if self.current is None: return
         v = float(val)
         self.zoom_var.set(int(v))
-        h,w = self.current.shape[:2]
-        img = cv2.resize(self.current,(int(w*v/100),int(h*v/100)))
-        self._draw(img)
-        self.status.config(text=f'Resize {int(v)}%')
+        self.scale = v/100
+        self._schedule_draw()
+        self._status(f'Resize {int(v)}%')
 
     def on_spin(self):
         v = self.zoom_var.get()
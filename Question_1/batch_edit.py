@@ -0,0 +1,102 @@
+import argparse
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import cv2
+
+import export
+import image_ops
+import lazy
+
+# -------------------------
+# Headless batch runner: apply a recipe to whole directories on a process pool
+# -------------------------
+
+EXTS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+_steps = None
+_opts = None
+
+def _init_worker(steps, opts):
+    global _steps, _opts
+    _steps, _opts = steps, opts
+    # One OpenCV thread per process, the pool already uses every core
+    cv2.setNumThreads(1)
+
+def _process(job):
+    src, dst = job
+    try:
+        img = cv2.imread(src)
+        if img is None:
+            return src, 'unreadable'
+        # Editor works in RGB, so keep the edits identical
+        cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
+        img = lazy.apply_steps(img, _steps)
+        if img.base is None:
+            cv2.cvtColor(img, cv2.COLOR_RGB2BGR, dst=img)
+        else:
+            img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+        os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+        if not cv2.imwrite(dst, img, _opts.params(dst)):
+            return src, 'write failed'
+        return src, None
+    except Exception as e:
+        return src, str(e)
+
+def find_jobs(src_dir, dst_dir, ext=None, recursive=False, skip_existing=False):
+    """Yield (source, destination) pairs lazily so huge folders start at once"""
+    for root, dirs, files in os.walk(src_dir):
+        if not recursive:
+            dirs[:] = []
+        for name in sorted(files):
+            if not name.lower().endswith(EXTS):
+                continue
+            rel = os.path.relpath(os.path.join(root, name), src_dir)
+            if ext:
+                rel = os.path.splitext(rel)[0] + ext
+            dst = os.path.join(dst_dir, rel)
+            if skip_existing and os.path.exists(dst):
+                continue
+            yield os.path.join(root, name), dst
+
+def run_batch(jobs, steps, workers=None, chunksize=16, opts=None, log=print):
+    done = failed = 0
+    t0 = time.perf_counter()
+    with Pool(workers, initializer=_init_worker, initargs=(steps, opts or export.ExportOptions())) as pool:
+        for src, err in pool.imap_unordered(_process, jobs, chunksize):
+            done += 1
+            if err:
+                failed += 1
+                log(f'FAILED {src}: {err}')
+            if done % 100 == 0:
+                log(f'{done} images, {done/(time.perf_counter()-t0):.1f} img/s')
+    log(f'Done: {done} images ({failed} failed) in {time.perf_counter()-t0:.1f}s')
+    return done, failed
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Apply image editor operations to a folder of images')
+    ap.add_argument('src', help='input directory')
+    ap.add_argument('dst', help='output directory')
+    g = ap.add_mutually_exclusive_group(required=True)
+    g.add_argument('--ops', help='comma separated operations, e.g. rotate_90,blur,invert')
+    g.add_argument('--recipe', help='JSON recipe saved from the editor')
+    ap.add_argument('--workers', type=int, default=None, help='processes (default: all cores)')
+    ap.add_argument('--ext', help='output extension, e.g. .jpg (default: keep)')
+    ap.add_argument('--recursive', action='store_true')
+    ap.add_argument('--skip-existing', action='store_true')
+    ap.add_argument('--chunksize', type=int, default=16)
+    ap.add_argument('--quality', type=int, default=95, help='JPEG quality')
+    ap.add_argument('--progressive', action='store_true', help='progressive JPEG')
+    ap.add_argument('--png-level', type=int, default=3, help='PNG compression 0-9')
+    args = ap.parse_args(argv)
+
+    steps = image_ops.load_recipe(args.recipe) if args.recipe else image_ops.parse_ops(args.ops)
+    jobs = find_jobs(args.src, args.dst, args.ext, args.recursive, args.skip_existing)
+    opts = export.ExportOptions(args.quality, args.progressive, png_compression=args.png_level)
+    done, failed = run_batch(jobs, steps, args.workers, args.chunksize, opts)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
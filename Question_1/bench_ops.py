@@ -0,0 +1,162 @@
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import image_ops
+import lazy
+import memo
+import tiled
+from pyramid import Pyramid
+
+# -------------------------
+# Benchmarks for the editor operations, no window needed
+# -------------------------
+# Every case runs over a matrix of image sizes and dtypes and reports the
+# best time, throughput in megapixels per second and the peak of memory
+# allocated through NumPy while it ran (OpenCV scratch buffers not included).
+# Only cases in ANY_DTYPE run on uint16/float32 frames; the others are
+# uint8 operations (look-up tables, bitwise invert, PIL conversion) whose
+# timings on other dtypes would not be comparable. Save a baseline once,
+# then compare later runs against it.
+
+VIEWPORT = (780, 620)   # canvas size of the default 1000x700 window
+
+def _crop(img):  return image_ops.crop(img, [0.1, 0.1, 0.9, 0.9]).copy()
+def _resize(img):
+    h,w = img.shape[:2]
+    return cv2.resize(img, (w//2, h//2))
+def _zoom_first(img):
+    # First draw after an edit: pyramid levels get built
+    return Pyramid(img).view(0.5, 0, 0, *VIEWPORT)
+def _to_pil(img): return Image.fromarray(img)
+
+TEN = [image_ops.step(n) for n in ('brighten','invert','flip_h','darken','grayscale',
+                                  'rotate_90','brighten','flip_v','invert','darken')]
+
+CASES = {
+    'rotate_90': image_ops.rotate_90,
+    'flip_h': image_ops.flip_h,
+    'flip_v': image_ops.flip_v,
+    'blur': image_ops.blur,
+    'grayscale': image_ops.grayscale,
+    'invert': image_ops.invert,
+    'sharpen': image_ops.sharpen,
+    'brighten': image_ops.brighten,
+    'darken': image_ops.darken,
+    'crop': _crop,
+    'zoom_resize': _resize,        # what on_zoom used to do on every slider move
+    'zoom_first': _zoom_first,
+    'ten_eager': lambda img: image_ops.apply_steps(img, TEN),
+    'ten_fused': lambda img: lazy.apply_steps(img, TEN),
+    'blur_tiled': lambda img: tiled.filter_tiled(img, image_ops.blur, tiled.halo(image_ops.step('blur')), dst=np.empty_like(img)),
+    'digest': memo.digest,         # cost of a result cache lookup
+    'to_pil': _to_pil,
+}
+
+# Same meaning whatever the dtype
+ANY_DTYPE = {'rotate_90', 'flip_h', 'flip_v', 'blur', 'grayscale', 'sharpen', 'crop',
+             'zoom_resize', 'zoom_first', 'blur_tiled', 'digest'}
+
+def _photo_case():
+    """PIL -> PhotoImage as in _draw, only when a display is available"""
+    try:
+        import tkinter as tk
+        from PIL import ImageTk
+        root = tk.Tk()
+        root.withdraw()
+    except Exception:
+        return None
+    return lambda img: ImageTk.PhotoImage(Image.fromarray(img))
+
+def make_image(w, h, dtype):
+    rng = np.random.default_rng(0)
+    img = cv2.GaussianBlur(rng.integers(0, 256, (h, w, 3), dtype=np.uint8), (9,9), 0)
+    if dtype == 'uint16': return img.astype(np.uint16) * 257
+    if dtype == 'float32': return img.astype(np.float32) / 255
+    return img
+
+def measure(func, img, repeat):
+    func(img)    # warm up caches and OpenCV's thread pool
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(img)
+        best = min(best, time.perf_counter()-t0)
+    tracemalloc.start()
+    func(img)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+def run(sizes, dtypes, names, repeat, log=print):
+    cases = {n: CASES[n] for n in names if n in CASES}
+    if 'photo' in names:
+        photo = _photo_case()
+        if photo: cases['photo'] = photo
+        else: log('photo: skipped, no display')
+    results = {}
+    log(f'{"case":<28}{"ms":>10}{"MP/s":>10}{"peak MB":>10}')
+    for w,h in sizes:
+        for dt in dtypes:
+            img = make_image(w, h, dt)
+            for name, func in cases.items():
+                if dt != 'uint8' and name not in ANY_DTYPE:
+                    continue
+                key = f'{name}@{w}x{h}/{dt}'
+                try:
+                    best, peak = measure(func, img, repeat)
+                except (cv2.error, TypeError):
+                    # operation not defined for this dtype
+                    log(f'{key:<28}{"n/a":>10}')
+                    continue
+                r = dict(ms=best*1000, mpps=w*h/1e6/best, peak_mb=peak/2**20)
+                results[key] = r
+                log(f'{key:<28}{r["ms"]:>10.2f}{r["mpps"]:>10.1f}{r["peak_mb"]:>10.1f}')
+    return results
+
+def compare(results, baseline, tolerance, log=print):
+    """Log cases slower than baseline by more than `tolerance`; returns their keys"""
+    slow = []
+    for key, r in results.items():
+        b = baseline.get(key)
+        if not b: continue
+        ratio = r['ms'] / b['ms']
+        if ratio > tolerance:
+            slow.append(key)
+            log(f'REGRESSION {key}: {b["ms"]:.2f} -> {r["ms"]:.2f} ms ({ratio:.2f}x)')
+    log(f'{len(slow)} regressions over {tolerance:.2f}x' if slow else 'No regressions')
+    return slow
+
+def _size(text):
+    w,h = text.lower().split('x')
+    return int(w), int(h)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Benchmark the image editor operations')
+    ap.add_argument('--sizes', default='1024x768,2048x1536,4096x3072')
+    ap.add_argument('--dtypes', default='uint8,uint16,float32')
+    ap.add_argument('--cases', default=','.join(list(CASES) + ['photo']))
+    ap.add_argument('--repeat', type=int, default=5)
+    ap.add_argument('--save', help='write results as a baseline JSON')
+    ap.add_argument('--baseline', help='compare against a baseline JSON')
+    ap.add_argument('--tolerance', type=float, default=1.25, help='slowdown ratio counted as a regression')
+    args = ap.parse_args(argv)
+
+    results = run([_size(s) for s in args.sizes.split(',')], args.dtypes.split(','),
+                  args.cases.split(','), args.repeat)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=1)
+    if args.baseline:
+        with open(args.baseline) as f:
+            return 1 if compare(results, json.load(f), args.tolerance) else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import os
+
+import cv2
+
+import tiled
+
+# -------------------------
+# Export pipeline: encoder options and several sizes from one pass
+# -------------------------
+# The largest output is made first and turned into BGR (in place when it is
+# a fresh resize), then every smaller one is resized from the previous
+# output, already in BGR. So the source image is read once and converted at
+# most once whatever the number of sizes.
+
+class ExportOptions:
+    def __init__(self, jpeg_quality=95, progressive=False, optimize=False, png_compression=3):
+        self.jpeg_quality = jpeg_quality          # 0-100, lower is faster to store and smaller
+        self.progressive = progressive            # progressive JPEG
+        self.optimize = optimize                  # optimized Huffman tables, slower, a bit smaller
+        self.png_compression = png_compression    # 0 (fast, big) to 9 (slow, small)
+
+    def params(self, path):
+        ext = os.path.splitext(path)[1].lower()
+        if ext in ('.jpg', '.jpeg'):
+            return [cv2.IMWRITE_JPEG_QUALITY, int(self.jpeg_quality),
+                    cv2.IMWRITE_JPEG_PROGRESSIVE, int(self.progressive),
+                    cv2.IMWRITE_JPEG_OPTIMIZE, int(self.optimize)]
+        if ext == '.png':
+            return [cv2.IMWRITE_PNG_COMPRESSION, int(self.png_compression)]
+        return []
+
+def parse_sizes(text):
+    """'100%, 50%, 1920px' -> [1.0, 0.5, '1920px'] (px is the longest side)"""
+    sizes = []
+    for tok in text.replace(' ', '').split(','):
+        if not tok: continue
+        try:
+            if tok.endswith('%'): f = float(tok[:-1])/100
+            elif tok.endswith('px'): f = int(tok[:-2])
+            else: f = 0
+        except ValueError:
+            f = 0
+        if not f > 0:
+            raise ValueError(f'Bad size {tok!r}, use e.g. 50% or 1920px')
+        sizes.append(tok if tok.endswith('px') else f)
+    return sizes
+
+def target_size(shape, size):
+    h,w = shape[:2]
+    f = int(size[:-2]) / max(h, w) if isinstance(size, str) else size
+    return max(1, round(w*f)), max(1, round(h*f))
+
+def size_path(path, wh, first):
+    """Where each size goes: the chosen path for the first, name_WxH.ext for the rest"""
+    if first: return path
+    root, ext = os.path.splitext(path)
+    return f'{root}_{wh[0]}x{wh[1]}{ext}'
+
+def write(path, bgr, opts):
+    # Write next to the target and rename, so a failed export never leaves half a file
+    root, ext = os.path.splitext(path)
+    tmp = f'{root}.part{ext}'
+    try:
+        if not cv2.imwrite(tmp, bgr, opts.params(path)):
+            raise IOError(f'could not write {os.path.basename(path)}')
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def export(img, path, sizes=(1.0,), opts=None, progress=None):
+    """Write RGB `img` at every size; returns the paths written"""
+    opts = opts or ExportOptions()
+    targets = sorted({target_size(img.shape, s) for s in sizes}, key=lambda wh: -wh[0]*wh[1])
+    written = []
+    src = None
+    for i, wh in enumerate(targets):
+        if src is None:
+            h,w = img.shape[:2]
+            if wh == (w, h):
+                # The frame is shared with the editor: one conversion into a new buffer
+                src = tiled.filter_tiled(img, lambda t: cv2.cvtColor(t, cv2.COLOR_RGB2BGR))
+            else:
+                src = cv2.resize(img, wh, interpolation=cv2.INTER_AREA)
+                cv2.cvtColor(src, cv2.COLOR_RGB2BGR, dst=src)
+        else:
+            src = cv2.resize(src, wh, interpolation=cv2.INTER_AREA)
+        p = size_path(path, wh, i == 0)
+        write(p, src, opts)
+        written.append(p)
+        if progress: progress((i+1)/len(targets))
+    return written
@@ -0,0 +1,165 @@
+import mmap
+import numpy as np
+
+import tiled
+from lazy import IDENTITY
+
+# -------------------------
+# Undo/redo store bounded by bytes instead of steps
+# -------------------------
+# The editor state is a frame plus the lazy edits pending on it. Each entry
+# holds whatever is needed to swap between the states on either side of
+# one step, and only the side that is not currently on screen:
+#   'pending' - a fused step (flip, rotate, invert, brightness, gray), no pixels
+#   'tiles'   - the tiles that changed, swapped in place with the current frame
+#   'frame'   - a whole frame, only when the step changed the image size (crop)
+#   'flatten' - no pixels: the fused edits that were baked into the frame, run
+#               backwards (or forwards again) in one pass on undo (redo)
+# Steps recorded as None are internal: the pending edits being flattened
+# into the frame before a step that can't be fused. Undo/redo walk over them.
+# Only flips, rotations and invert can be run backwards; flattening grayscale
+# or brightness changes is stored as tiles (or a frame, if rotated too).
+
+TILE = 256
+DEFAULT_BUDGET = 512 * 2**20
+
+def _own(img):
+    return img if img.flags.writeable else tiled.copy(img)
+
+class Entry:
+    def __init__(self, kind, pending, data=None, nbytes=0):
+        self.kind = kind
+        self.pending = pending
+        self.data = data
+        self.nbytes = nbytes
+
+def _union(a, b):
+    """Changed part of a frame: False (none), True (all) or a (y0, x0, y1, x1) box"""
+    if a is False: return b
+    if b is False: return a
+    if a is True or b is True: return True
+    return min(a[0],b[0]), min(a[1],b[1]), max(a[2],b[2]), max(a[3],b[3])
+
+def _changed_tiles(before, after, tile):
+    tiles = []
+    h,w = before.shape[:2]
+    for y in range(0, h, tile):
+        for x in range(0, w, tile):
+            b = before[y:y+tile, x:x+tile]
+            if not np.array_equal(b, after[y:y+tile, x:x+tile]):
+                tiles.append((y, x, b.copy()))
+    return tiles
+
+class History:
+    def __init__(self, budget=DEFAULT_BUDGET, tile=TILE, own=_own):
+        self.budget = budget
+        self.tile = tile
+        self.own = own       # read-only frame -> writeable one, before tiles are swapped in
+        self.reset()
+
+    def reset(self):
+        self.steps = []      # every step applied since load, even if no longer undoable
+        self.entries = []    # parallel to steps, None once evicted
+        self.pos = 0
+        self.nbytes = 0
+
+    @property
+    def recipe(self):
+        return [s for s in self.steps[:self.pos] if s is not None]
+
+    def can_undo(self):
+        return self.pos > 0 and self.entries[self.pos-1] is not None
+
+    def can_redo(self):
+        return self.pos < len(self.steps)
+
+    def push(self, before, after, step, pending=IDENTITY):
+        """Record (before, pending) -> after; returns the frame the caller should keep"""
+        self._truncate(self.pos)
+        inverse = pending.inverse() if step is None else None
+        if after is before:
+            entry = Entry('pending', pending)
+        elif inverse is not None:
+            entry = Entry('flatten', pending, inverse)
+        else:
+            # Tiles get swapped in place later, so the current frame must not share memory
+            # (a scratch memmap from tiled.py is fine, it owns its file)
+            if after.base is not None and not isinstance(after.base, mmap.mmap):
+                after = tiled.copy(after)
+            if before.shape != after.shape:
+                entry = Entry('frame', pending, before, before.nbytes)
+            else:
+                tiles = _changed_tiles(before, after, self.tile)
+                entry = Entry('tiles', pending, tiles, sum(t.nbytes for _,_,t in tiles))
+        self.steps.append(step)
+        self.entries.append(entry)
+        self.pos += 1
+        self.nbytes += entry.nbytes
+        self._evict()
+        return after
+
+    def undo(self, current, pending):
+        """(frame, pending, changed) one user step back, or None; `changed` is
+        False, True (whole frame) or the (y0, x0, y1, x1) box of changed pixels"""
+        if not self.can_undo(): return None
+        dirty = False
+        while True:
+            self.pos -= 1
+            current, pending, d = self._swap(self.entries[self.pos], current, pending)
+            dirty = _union(dirty, d)
+            if not (self.can_undo() and self.steps[self.pos-1] is None):
+                return current, pending, dirty
+
+    def redo(self, current, pending):
+        if not self.can_redo(): return None
+        dirty = False
+        while True:
+            step = self.steps[self.pos]
+            current, pending, d = self._swap(self.entries[self.pos], current, pending)
+            self.pos += 1
+            dirty = _union(dirty, d)
+            if step is not None:
+                return current, pending, dirty
+
+    def _swap(self, entry, current, pending):
+        entry.pending, pending = pending, entry.pending
+        if entry.kind == 'pending':
+            return current, pending, False
+        if entry.kind == 'flatten':
+            current = tiled.apply_pending(current, entry.data)
+            entry.data = entry.data.inverse()
+            return current, pending, True
+        if entry.kind == 'frame':
+            entry.data, current = current, entry.data
+            entry.nbytes = entry.data.nbytes
+            self.nbytes += entry.nbytes - current.nbytes
+            return current, pending, True
+        if not current.flags.writeable:
+            # Shared with the result cache: the owner hands it back (or a copy)
+            current = self.own(current)
+        box = False
+        for i, (y, x, t) in enumerate(entry.data):
+            region = current[y:y+t.shape[0], x:x+t.shape[1]]
+            entry.data[i] = (y, x, region.copy())
+            region[...] = t
+            box = _union(box, (y, x, y+t.shape[0], x+t.shape[1]))
+        return current, pending, box
+
+    def _truncate(self, n):
+        for e in self.entries[n:]:
+            if e is not None:
+                self.nbytes -= e.nbytes
+        del self.steps[n:], self.entries[n:]
+
+    def _evict(self):
+        i = 0
+        while self.nbytes > self.budget and i < len(self.entries):
+            e = self.entries[i]
+            if e is not None:
+                if i >= self.pos:
+                    # Only redo entries are left, drop the redo branch
+                    self._truncate(i)
+                    break
+                self.nbytes -= e.nbytes
+                self.entries[i] = None
+            i += 1
@@ -0,0 +1,82 @@
+import json
+import cv2
+import numpy as np
+
+# -------------------------
+# Image operations shared by the editor and the batch tool (no Tk here)
+# -------------------------
+
+SHARPEN_KERNEL = np.array([[0,-1,0],[-1,5,-1],[0,-1,0]])
+IDENTITY_KERNEL = np.array([[0,0,0],[0,1,0],[0,0,0]])
+
+def rotate_90(img):      return cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)
+def flip_h(img):         return cv2.flip(img,1)
+def flip_v(img):         return cv2.flip(img,0)
+def blur(img, ksize=7):  return cv2.GaussianBlur(img,(ksize,ksize),0)
+def grayscale(img):      return cv2.cvtColor(cv2.cvtColor(img, cv2.COLOR_RGB2GRAY), cv2.COLOR_GRAY2RGB)
+def invert(img):         return cv2.bitwise_not(img)
+def sharpen(img, amount=1):
+    # amount=1 is the classic kernel, 0 leaves the image alone
+    k = SHARPEN_KERNEL if amount == 1 else np.float32(IDENTITY_KERNEL + amount*(SHARPEN_KERNEL-IDENTITY_KERNEL))
+    return cv2.filter2D(img,-1,k)
+def bright_lut(delta):
+    return np.clip(np.arange(256, dtype=np.int16)+delta,0,255).astype(np.uint8)
+# Saturating add through a look-up table: one uint8 pass, no wider copy of the frame
+def bright(img, delta):  return cv2.LUT(img, bright_lut(delta))
+def brighten(img):       return bright(img, 30)
+def darken(img):         return bright(img, -30)
+
+def crop(img, box):
+    """Crop by a fractional (x0, y0, x1, y1) box so a recipe fits any image size"""
+    h,w = img.shape[:2]
+    x0,y0,x1,y1 = box
+    # Rounded: the editor stores pixel edges as fractions, and 29/100*100 < 29
+    return img[round(y0*h):round(y1*h), round(x0*w):round(x1*w)]
+
+OPS = {
+    'rotate_90': rotate_90,
+    'flip_h': flip_h,
+    'flip_v': flip_v,
+    'blur': blur,
+    'grayscale': grayscale,
+    'invert': invert,
+    'sharpen': sharpen,
+    'brighten': brighten,
+    'darken': darken,
+    'bright': bright,
+    'crop': crop,
+}
+
+# A step is a dict like {'op': 'blur'} or {'op': 'crop', 'box': [0, 0, .5, .5]}
+def step(op, **params):
+    if op not in OPS:
+        raise ValueError(f'Unknown operation: {op}')
+    return dict(op=op, **params)
+
+def at_scale(s, scale):
+    """The step as it looks on an image shown at `scale`, for previews on the display proxy"""
+    if s['op'] == 'blur':
+        return step('blur', ksize=max(1, int(s.get('ksize', 7)*scale)) | 1)
+    return s
+
+def apply_step(img, s):
+    params = {k: v for k, v in s.items() if k != 'op'}
+    return OPS[s['op']](img, **params)
+
+def apply_steps(img, steps):
+    for s in steps:
+        img = apply_step(img, s)
+    return img
+
+def parse_ops(text):
+    """Turn 'rotate_90,blur,invert' into a list of steps"""
+    return [step(name.strip()) for name in text.split(',') if name.strip()]
+
+def load_recipe(path):
+    with open(path) as f:
+        data = json.load(f)
+    return [step(**s) for s in data]
+
+def save_recipe(path, steps):
+    with open(path, 'w') as f:
+        json.dump(list(steps), f, indent=2)
@@ -0,0 +1,122 @@
+import cv2
+import numpy as np
+
+import image_ops
+
+# -------------------------
+# Lazy edits: runs of cheap operations folded into one pass
+# -------------------------
+# Point-wise ops (brighten, darken, invert, grayscale) and geometric ops
+# (rotate, flips) commute, so any run of them collapses into
+#   one look-up table -> optional grayscale -> one look-up table
+# followed by one of the 8 rotations/flips of the rectangle. The result is
+# identical to applying the steps one by one.
+
+IDENTITY_LUT = np.arange(256, dtype=np.uint8)
+
+LUTS = {
+    'brighten': image_ops.bright_lut(30),
+    'darken': image_ops.bright_lut(-30),
+    'invert': 255 - IDENTITY_LUT,
+}
+
+class Pending:
+    """Fused, not yet applied edits; immutable so history can keep old ones"""
+    def __init__(self, lut0=IDENTITY_LUT, gray=False, lut1=IDENTITY_LUT, t=False, fh=False, fv=False):
+        self.lut0, self.gray, self.lut1 = lut0, gray, lut1
+        self.t, self.fh, self.fv = t, fh, fv
+
+    @property
+    def is_identity(self):
+        return not (self.gray or self.t or self.fh or self.fv) and np.array_equal(self.lut0, IDENTITY_LUT)
+
+    def add(self, s):
+        """Pending with step `s` folded in, or None if it can't be fused"""
+        op = s['op']
+        lut0, gray, lut1 = self.lut0, self.gray, self.lut1
+        t, fh, fv = self.t, self.fh, self.fv
+        if op in LUTS or op == 'bright':
+            lut = LUTS[op] if op in LUTS else image_ops.bright_lut(s['delta'])
+            if gray: lut1 = lut[lut1]
+            else: lut0 = lut[lut0]
+        elif op == 'grayscale':
+            # Gray of an already gray image is itself
+            gray = True
+        elif op == 'flip_h':
+            fh = not fh
+        elif op == 'flip_v':
+            fv = not fv
+        elif op == 'rotate_90':
+            # Rotating clockwise is transpose then flip_h; transpose swaps the flip axes
+            t, fh, fv = not t, not fv, fh
+        else:
+            return None
+        return Pending(lut0, gray, lut1, t, fh, fv)
+
+    def inverse(self):
+        """Pending that undoes this one, or None if it loses information (gray, clipped brightness)"""
+        if self.gray or len(np.unique(self.lut0)) < 256:
+            return None
+        inv = np.empty_like(self.lut0)
+        inv[self.lut0] = IDENTITY_LUT
+        # Undoing flips first and transposes last; a flip before a transpose is the other flip after it
+        fh, fv = (self.fv, self.fh) if self.t else (self.fh, self.fv)
+        return Pending(inv, False, IDENTITY_LUT, self.t, fh, fv)
+
+    @property
+    def key(self):
+        """Hashable value equal for pendings that do the same thing"""
+        return (self.lut0.tobytes(), self.gray, self.lut1.tobytes(), self.t, self.fh, self.fv)
+
+    def shape(self, shape):
+        h,w = shape[:2]
+        return (w,h) if self.t else (h,w)
+
+    def apply(self, img):
+        """Materialize: at most one full-size pass per stage that is not identity"""
+        if not np.array_equal(self.lut0, IDENTITY_LUT):
+            img = cv2.LUT(img, self.lut0)
+        if self.gray:
+            g = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+            if not np.array_equal(self.lut1, IDENTITY_LUT):
+                g = cv2.LUT(g, self.lut1)
+            img = cv2.cvtColor(g, cv2.COLOR_GRAY2RGB)
+        return self._geometry(img)
+
+    def _geometry(self, img):
+        if self.t:
+            if self.fh and self.fv: return cv2.flip(cv2.transpose(img), -1)
+            if self.fh: return cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)
+            if self.fv: return cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE)
+            return cv2.transpose(img)
+        if self.fh and self.fv: return cv2.flip(img, -1)
+        if self.fh: return cv2.flip(img, 1)
+        if self.fv: return cv2.flip(img, 0)
+        return img
+
+    def source_window(self, ow, oh, x, y, w, h):
+        """Window of the source that ends up at (x, y, w, h) of the ow×oh result"""
+        # Walk the window back through the flips and transpose
+        if self.fh: x = ow - x - w
+        if self.fv: y = oh - y - h
+        if self.t: x,y,w,h = y,x,h,w
+        return x, y, w, h
+
+    def view(self, pyramid, scale, x, y, w, h):
+        """Like Pyramid.view but of the edited image; only the window is computed"""
+        bh,bw = pyramid.base.shape[:2]
+        ow,oh = (int(bh*scale), int(bw*scale)) if self.t else (int(bw*scale), int(bh*scale))
+        return self.apply(pyramid.view(scale, *self.source_window(ow, oh, x, y, w, h)))
+
+IDENTITY = Pending()
+
+def apply_steps(img, steps):
+    """image_ops.apply_steps, with fusable runs done in a single pass"""
+    pending = IDENTITY
+    for s in steps:
+        nxt = pending.add(s)
+        if nxt is None:
+            img = image_ops.apply_step(pending.apply(img), s)
+            nxt = IDENTITY
+        pending = nxt
+    return pending.apply(img)
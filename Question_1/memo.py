@@ -0,0 +1,110 @@
+import hashlib
+import json
+import mmap
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import tiled
+
+# -------------------------
+# Results of operations, remembered by the content they were computed from
+# -------------------------
+# Full frames are keyed by where they came from rather than by their pixels:
+# the load they started from and chain_key() of the steps applied since, so
+# undo then redo, or the same slider value again, finds its result without
+# reading the frame. digest() hashes pixels and is meant for small arrays
+# such as the viewport preview. Stored arrays are made read-only; anything
+# that edits one in place takes it back with release() first (history does).
+
+DEFAULT_BUDGET = 256 * 2**20
+BAND = 16 * 2**20    # bytes hashed per thread for big frames
+
+def _hash(buf):
+    return hashlib.sha1(buf).digest()
+
+def digest(img):
+    """Hash of shape, dtype and pixels; big frames are hashed in row bands on threads"""
+    img = np.ascontiguousarray(img)
+    h = hashlib.sha1(f'{img.shape}{img.dtype}'.encode())
+    if img.nbytes <= BAND:
+        h.update(img)
+        return h.hexdigest()
+    rows = max(1, BAND // (img.nbytes // img.shape[0]))
+    with ThreadPoolExecutor() as ex:
+        # hashlib drops the GIL for large buffers
+        for part in ex.map(_hash, [img[y:y+rows] for y in range(0, img.shape[0], rows)]):
+            h.update(part)
+    return h.hexdigest()
+
+def step_key(s):
+    return json.dumps(s, sort_keys=True)
+
+def chain_key(steps):
+    """Short key for a sequence of steps, applied in order"""
+    h = hashlib.sha1()
+    for s in steps:
+        h.update(step_key(s).encode())
+        h.update(b'\n')
+    return h.hexdigest()
+
+class ResultCache:
+    """Least recently used results, bounded by bytes; safe to share between threads"""
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self.budget = budget
+        self.items = OrderedDict()
+        self.nbytes = 0
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            img = self.items.get(key)
+            if img is None:
+                self.misses += 1
+                return None
+            self.items.move_to_end(key)
+            self.hits += 1
+            return img
+
+    def put(self, key, img):
+        """Store img under key; returns the array to use from now on (read-only)"""
+        if img.base is not None and not isinstance(img.base, mmap.mmap):
+            # A view would keep its parent alive, and the parent may be edited in place
+            img = tiled.copy(img)
+        img.flags.writeable = False
+        if img.nbytes > self.budget:
+            return img
+        with self.lock:
+            old = self.items.pop(key, None)
+            if old is not None: self.nbytes -= old.nbytes
+            self.items[key] = img
+            self.nbytes += img.nbytes
+            while self.nbytes > self.budget:
+                _, dropped = self.items.popitem(last=False)
+                self.nbytes -= dropped.nbytes
+        return img
+
+    def compute(self, key, fn):
+        """Cached result for key, else fn() stored under it"""
+        img = self.get(key)
+        return img if img is not None else self.put(key, fn())
+
+    def release(self, img):
+        """Drop img from the cache and return it writeable, or a writeable copy
+        if it can't be (a read-only memmap, a view of a read-only array)"""
+        with self.lock:
+            for key in [k for k, v in self.items.items() if v is img]:
+                self.nbytes -= self.items.pop(key).nbytes
+        try:
+            img.flags.writeable = True
+        except ValueError:
+            img = tiled.copy(img)
+        return img
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+            self.nbytes = 0
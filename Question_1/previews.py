@@ -0,0 +1,92 @@
+import hashlib
+import os
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import tiled
+
+# -------------------------
+# Quick previews for loading: reduced JPEG decodes and an on-disk cache
+# -------------------------
+# Cache entries are keyed by absolute path, modification time and file size,
+# so an edited or replaced file never shows a stale preview.
+
+PREVIEW_SIDE = 1024
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+                         'premium_image_editor', 'previews')
+CACHE_KEEP = 500
+
+EXIF_ORIENTATION = 0x0112
+REDUCED = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+def image_size(path):
+    """(height, width) from the file header, without decoding pixels"""
+    if path.lower().endswith('.npy'):
+        return tiled.open_scan(path, 'r').shape[:2]
+    with Image.open(path) as im:
+        w,h = im.size
+        # cv2.imread turns the pixels upright by the EXIF orientation; 5-8 swap the sides
+        if im.getexif().get(EXIF_ORIENTATION) in (5, 6, 7, 8):
+            w,h = h,w
+    return h, w
+
+def _key(path):
+    st = os.stat(path)
+    raw = f'{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}'
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def cached(path):
+    """RGB preview from the cache, or None"""
+    try:
+        f = os.path.join(CACHE_DIR, _key(path) + '.jpg')
+    except OSError:
+        return None
+    img = cv2.imread(f) if os.path.exists(f) else None
+    if img is None: return None
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
+
+def store(path, img):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        cv2.imwrite(os.path.join(CACHE_DIR, _key(path) + '.jpg'),
+                    cv2.cvtColor(shrink(img), cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 90])
+        _trim()
+    except OSError:
+        pass   # a missing preview only costs speed
+
+def _trim():
+    files = [os.path.join(CACHE_DIR, f) for f in os.listdir(CACHE_DIR)]
+    if len(files) <= CACHE_KEEP: return
+    files.sort(key=os.path.getmtime)
+    for f in files[:-CACHE_KEEP]:
+        os.remove(f)
+
+def shrink(img, side=PREVIEW_SIDE):
+    h,w = img.shape[:2]
+    f = side / max(h, w)
+    if f >= 1: return img
+    return cv2.resize(img, (max(1,int(w*f)), max(1,int(h*f))), interpolation=cv2.INTER_AREA)
+
+def decode(path, shape, side=PREVIEW_SIDE):
+    """Cheap reduced-resolution decode, or None when it would not be cheaper"""
+    h,w = shape
+    if path.lower().endswith('.npy'):
+        step = max(1, max(h, w) // side)
+        return np.ascontiguousarray(tiled.open_scan(path, 'r')[::step, ::step]) if step > 1 else None
+    if not path.lower().endswith(('.jpg', '.jpeg')):
+        return None
+    # JPEG decoders can skip most of the work at 1/2, 1/4 and 1/8 scale
+    for f, flag in REDUCED:
+        if max(h, w) // f >= side:
+            img = cv2.imread(path, flag)
+            return None if img is None else cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
+    return None
+
+def preview(path, shape):
+    """(preview, from_cache) for path whose full size is `shape`"""
+    img = cached(path)
+    if img is not None:
+        return img, True
+    return decode(path, shape), False
@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+
+import tiled
+
+# -------------------------
+# Resolution pyramid used for zoomed display
+# -------------------------
+# Level 0 is the full image, each next level is half the size of the one
+# before. Levels are only built when a zoom needs them, and each one comes
+# from the level above it, so an edit costs nothing until the view asks.
+# Every level pixel is the mean of a 2×2 block of the level above (an odd
+# last row or column is left out), so when only part of the base changes
+# the built levels are patched over that part instead of being dropped.
+
+MIN_SIZE = 32
+
+def _half(img):
+    h,w = img.shape[:2]
+    return cv2.resize(np.ascontiguousarray(img[:h//2*2, :w//2*2]), (w//2, h//2), interpolation=cv2.INTER_AREA)
+
+class Pyramid:
+    def __init__(self, img=None):
+        self.levels = []
+        if img is not None:
+            self.set(img)
+
+    def set(self, img, box=None):
+        """Point the pyramid at a new (or edited in place) base image; with `box`
+        (y0, x0, y1, x1) only that part of a same-size base changed"""
+        if box is None or not self.levels or self.levels[0].shape != img.shape:
+            self.levels = [img]
+            return
+        self.levels[0] = img
+        y0,x0,y1,x1 = box
+        for k in range(1, len(self.levels)):
+            lvl = self.levels[k]
+            y0,x0 = y0//2, x0//2
+            y1,x1 = min(lvl.shape[0], -(-y1//2)), min(lvl.shape[1], -(-x1//2))
+            if y1 <= y0 or x1 <= x0:
+                break
+            lvl[y0:y1, x0:x1] = _half(self.levels[k-1][2*y0:2*y1, 2*x0:2*x1])
+
+    @property
+    def base(self):
+        return self.levels[0] if self.levels else None
+
+    def level(self, k):
+        while len(self.levels) <= k:
+            prev = self.levels[-1]
+            h,w = prev.shape[:2]
+            if min(h,w) < MIN_SIZE*2:
+                break
+            if tiled.is_large(prev):
+                self.levels.append(tiled.half(prev))
+            else:
+                self.levels.append(_half(prev))
+        return min(k, len(self.levels)-1)
+
+    def pick(self, scale):
+        """Smallest level that still has at least `scale` of the base resolution"""
+        k = 0
+        while scale <= 0.5**(k+1):
+            k += 1
+        return self.level(k)
+
+    def view(self, scale, x, y, w, h):
+        """Render the w×h window at (x, y) of the base image zoomed by `scale`"""
+        src = self.levels[self.pick(scale)]
+        bh,bw = self.base.shape[:2]
+        fx = scale * bw / src.shape[1]
+        fy = scale * bh / src.shape[0]
+        # Maps source pixels (centre aligned) straight into the window, so only
+        # the w×h visible pixels are ever computed
+        m = np.float32([[fx, 0, 0.5*fx-0.5-x], [0, fy, 0.5*fy-0.5-y]])
+        interp = cv2.INTER_NEAREST if scale >= 2 else cv2.INTER_LINEAR
+        return cv2.warpAffine(src, m, (w, h), flags=interp, borderMode=cv2.BORDER_REPLICATE)
@@ -0,0 +1,138 @@
+import queue
+import threading
+import time
+import traceback
+
+# -------------------------
+# Background execution for the editor
+# -------------------------
+# Jobs run one at a time, in the order they were submitted, on a worker
+# thread. A job's `work(task)` runs off the Tk thread; its `done(result)`
+# is called back on the Tk thread through after(), and `always()` after
+# that whatever happened (done, failed or cancelled). The next job only starts
+# once the previous `done` has run, so every job sees the state left by the
+# one before it and the image is never changed from two threads at once.
+# Work that edits the shown frame in place (undo/redo swapping tiles) goes
+# in `done` with no `work`, so it runs on the Tk thread that draws the frame.
+# A callback that raises is reported in the status line; the queue goes on.
+
+class Cancelled(Exception):
+    pass
+
+class Task:
+    def __init__(self, work, done, label, calls, always=None):
+        self.work = work
+        self.done = done
+        self.always = always
+        self.label = label
+        self.cancelled = False
+        self.frac = None
+        self.started = None
+        self.applied = threading.Event()
+        self._calls = calls
+
+    def check(self):
+        """Cancellation point for long jobs"""
+        if self.cancelled:
+            raise Cancelled()
+
+    def progress(self, frac):
+        self.frac = frac
+        self.check()
+
+    def post(self, fn, *args):
+        """Run fn(*args) on the Tk thread while the job carries on, e.g. to show a preview"""
+        self._calls.put((self, fn, args))
+
+class TaskRunner:
+    def __init__(self, root, status, poll=20, timings=None):
+        self.root = root
+        self.status = status      # callable taking a status line
+        self.timings = timings    # optional timing.Timings, jobs are timed by label
+        self.poll = poll
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.calls = queue.Queue()
+        self.running = None
+        self.pending = 0
+        threading.Thread(target=self._loop, daemon=True).start()
+        root.after(poll, self._poll)
+
+    def submit(self, work, done=None, label='', always=None):
+        t = Task(work, done, label, self.calls, always)
+        self.pending += 1
+        self.jobs.put(t)
+        return t
+
+    def busy(self):
+        return self.pending > 0
+
+    def cancel(self):
+        """Stop the running job at its next cancellation point, queued jobs still run"""
+        t = self.running
+        if t is not None:
+            t.cancelled = True
+
+    def _loop(self):
+        while True:
+            t = self.jobs.get()
+            self.running = t
+            t.started = time.perf_counter()
+            res = err = None
+            try:
+                t.check()
+                if t.work is not None and self.timings is not None:
+                    with self.timings.span(t.label):
+                        res = t.work(t)
+                elif t.work is not None:
+                    res = t.work(t)
+            except Exception as e:
+                err = e
+            self.results.put((t, res, err))
+            t.applied.wait()
+            self.running = None
+
+    def _callback(self, t, fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            traceback.print_exc()
+            self.status(f'{t.label} failed: {e}')
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    t, fn, args = self.calls.get_nowait()
+                except queue.Empty:
+                    break
+                if not t.cancelled:
+                    self._callback(t, fn, *args)
+            while True:
+                try:
+                    t, res, err = self.results.get_nowait()
+                except queue.Empty:
+                    break
+                self.pending -= 1
+                try:
+                    if isinstance(err, Cancelled):
+                        self.status(f'{t.label} cancelled')
+                    elif err is not None:
+                        self.status(f'{t.label} failed: {err}')
+                    elif t.done is not None:
+                        self._callback(t, t.done, res)
+                    if t.always is not None:
+                        self._callback(t, t.always)
+                finally:
+                    t.applied.set()
+            t = self.running
+            if t is not None and not t.applied.is_set():
+                msg = f'{t.label}…'
+                if t.frac is not None:
+                    msg += f' {int(t.frac*100)}%'
+                msg += f' ({time.perf_counter()-t.started:.1f}s, Esc to cancel)'
+                if self.pending > 1:
+                    msg += f' +{self.pending-1} queued'
+                self.status(msg)
+        finally:
+            self.root.after(self.poll, self._poll)
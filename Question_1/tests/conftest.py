@@ -0,0 +1,35 @@
+import os
+import sys
+import time
+
+import pytest
+
+# The editor modules import each other by name, as when run from Question_1
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class FakeRoot:
+    """Stands in for Tk: after() callbacks only run when pump() says so"""
+    def __init__(self):
+        self.due = []
+
+    def after(self, ms, fn):
+        self.due.append(fn)
+        return fn
+
+    def after_cancel(self, job):
+        if job in self.due:
+            self.due.remove(job)
+
+    def pump(self, until, timeout=5):
+        """Run due callbacks, and the ones they schedule, until until() holds"""
+        end = time.monotonic() + timeout
+        while not until():
+            assert time.monotonic() < end, 'timed out'
+            due, self.due = self.due, []
+            for fn in due:
+                fn()
+            time.sleep(0.002)
+
+@pytest.fixture
+def tk_root():
+    return FakeRoot()
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+import lazy
+import memo
+import Q_1_Answer
+from history import History
+from Q_1_Answer import ImageEditor
+from tasks import TaskRunner
+
+class FakeScale:
+    def __init__(self, editor, op, value):
+        self.editor, self.op, self.value = editor, op, value
+
+    def get(self):
+        return self.value
+
+    def set(self, v):
+        # ttk.Scale reports programmatic moves through its command too
+        self.value = v
+        self.editor.on_adjust(self.op, v)
+
+class FakeLabel:
+    def config(self, text):
+        self.text = text
+
+class Editor:
+    """The slider and apply path of ImageEditor, without a window"""
+    on_adjust = ImageEditor.on_adjust
+    _commit_later = ImageEditor._commit_later
+    commit_adjust = ImageEditor.commit_adjust
+    _apply = ImageEditor._apply
+
+    def __init__(self, root):
+        self.root = root
+        self.after, self.after_cancel = root.after, root.after_cancel
+        self.status = FakeLabel()
+        self.tasks = TaskRunner(root, self.status.config, poll=1)
+        self.results = memo.ResultCache()
+        self.history = History(own=self.results.release)
+        self.current = np.zeros((8, 8, 3), np.uint8)
+        self.pending = lazy.IDENTITY
+        self.load_id = 1
+        self.preview_step = self._committing = None
+        self._commit_job = None
+        self.adjusters = {op: (FakeScale(self, op, neutral), neutral)
+                          for _, op, _, _, neutral in Q_1_Answer.ADJUSTERS}
+
+    def _schedule_draw(self):
+        pass
+
+    def _set_current(self, res, msg):
+        if res is not None:
+            self.current, self.pending, _ = res
+
+    def drag(self, op, v):
+        s, _ = self.adjusters[op]
+        s.value = v
+        self.on_adjust(op, v)
+
+    def settle(self):
+        self.root.pump(lambda: not self.tasks.busy())
+
+@pytest.fixture
+def editor(tk_root):
+    return Editor(tk_root)
+
+def test_slider_commits_once(editor):
+    editor.drag('blur', 15)
+    step = editor.preview_step
+    editor.commit_adjust('blur')          # ButtonRelease
+    assert editor.preview_step is None and editor._committing is step
+    editor.commit_adjust('blur')          # Return
+    editor._commit_later('blur')          # KeyRelease
+    editor._commit_job()                  # ... once the key delay runs out
+    editor.commit_adjust('blur')          # FocusOut
+    editor.settle()
+    assert editor.history.recipe == [step]
+    assert editor._committing is None
+    assert editor.adjusters['blur'][0].get() == editor.adjusters['blur'][1]
+
+def test_key_edits_commit_after_the_delay(editor):
+    editor.drag('bright', 20)
+    editor._commit_later('bright')
+    first = editor._commit_job
+    editor.drag('bright', 30)
+    editor._commit_later('bright')
+    assert first not in editor.root.due
+    editor._commit_job()
+    editor.settle()
+    assert [s['delta'] for s in editor.history.recipe] == [30]
+
+def test_commit_of_another_slider_is_ignored(editor):
+    editor.drag('blur', 15)
+    editor.commit_adjust('bright')
+    assert editor._committing is None and editor.preview_step is not None
+
+def test_failed_commit_resets_the_slider(editor):
+    editor.drag('blur', 15)
+    editor.current = None                 # nothing to apply to, the job returns None
+    editor.commit_adjust('blur')
+    editor.settle()
+    assert editor._committing is None and editor.history.recipe == []
+    assert editor.adjusters['blur'][0].get() == editor.adjusters['blur'][1]
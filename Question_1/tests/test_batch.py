@@ -0,0 +1,48 @@
+import cv2
+import numpy as np
+import pytest
+
+import batch_edit
+import image_ops
+from image_ops import step
+
+def test_bright_clips_without_wrapping():
+    img = np.random.default_rng(0).integers(0, 256, (20, 30, 3), np.uint8)
+    lut = image_ops.bright_lut(30)
+    assert lut.dtype == np.uint8 and lut[0] == 30 and lut[240] == 255
+    assert np.array_equal(image_ops.bright(img, -300), np.zeros_like(img))
+
+@pytest.mark.parametrize('w', [100, 37, 1000])
+def test_crop_keeps_the_pixels_picked(w):
+    # The editor turns pixel edges into fractions of the size; cropping the same
+    # image must give back exactly those edges
+    img = np.zeros((3, w, 3), np.uint8)
+    for x0 in range(0, w, max(1, w // 100)):
+        for x1 in range(x0 + 1, w + 1, max(1, w // 100)):
+            assert image_ops.crop(img, [x0/w, 0, x1/w, 1]).shape[1] == x1 - x0
+
+def test_recipe_round_trip(tmp_path):
+    steps = image_ops.parse_ops('rotate_90, blur,invert') + [step('crop', box=[0.1, 0.2, 0.5, 0.9])]
+    path = str(tmp_path / 'recipe.json')
+    image_ops.save_recipe(path, steps)
+    assert image_ops.load_recipe(path) == steps
+    with pytest.raises(ValueError):
+        image_ops.parse_ops('rotate_90,melt')
+
+def test_batch_matches_the_editor_ops(tmp_path):
+    rng = np.random.default_rng(1)
+    src, dst = tmp_path / 'in', tmp_path / 'out'
+    (src / 'sub').mkdir(parents=True)
+    imgs = {}
+    for name in ['a.png', 'sub/b.png']:
+        imgs[name] = rng.integers(0, 256, (40, 50, 3), np.uint8)
+        cv2.imwrite(str(src / name), imgs[name])
+    (src / 'notes.txt').write_text('skip me')
+    steps = image_ops.parse_ops('rotate_90,invert,blur,brighten')
+    jobs = list(batch_edit.find_jobs(str(src), str(dst), recursive=True))
+    assert len(jobs) == 2
+    assert batch_edit.run_batch(jobs, steps, workers=2, log=lambda *a: None) == (2, 0)
+    for name, bgr in imgs.items():
+        rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+        want = cv2.cvtColor(image_ops.apply_steps(rgb, steps), cv2.COLOR_RGB2BGR)
+        assert np.array_equal(cv2.imread(str(dst / name)), want)
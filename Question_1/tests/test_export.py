@@ -0,0 +1,24 @@
+import os
+
+import numpy as np
+import pytest
+
+import export
+
+def test_parse_sizes():
+    assert export.parse_sizes('100%, 50%,1920px') == [1.0, 0.5, '1920px']
+    for bad in ['abcpx', '0%', '-5px', '12', '1.5px']:
+        with pytest.raises(ValueError):
+            export.parse_sizes(bad)
+
+def test_export_writes_every_size_and_no_part_files(tmp_path):
+    img = np.random.default_rng(3).integers(0, 256, (60, 80, 3), np.uint8)
+    paths = export.export(img, str(tmp_path / 'out.png'), export.parse_sizes('100%,50%,20px'))
+    assert [os.path.basename(p) for p in paths] == ['out.png', 'out_40x30.png', 'out_20x15.png']
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(p) for p in paths)
+
+def test_failed_write_leaves_nothing(tmp_path):
+    with pytest.raises(Exception):
+        export.write(str(tmp_path / 'out.nosuchformat'), np.zeros((4, 4, 3), np.uint8),
+                     export.ExportOptions())
+    assert os.listdir(tmp_path) == []
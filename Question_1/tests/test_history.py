@@ -0,0 +1,58 @@
+import numpy as np
+
+import lazy
+from history import History
+from image_ops import step
+
+def frame(value=0, shape=(600, 500, 3)):
+    return np.full(shape, value, np.uint8)
+
+def test_tile_entries_keep_only_changed_tiles():
+    h = History(tile=256)
+    before = frame()
+    after = before.copy()
+    after[300:310, 10:20] = 9
+    kept = h.push(before, after, step('invert'))
+    assert h.nbytes == 256 * 256 * 3
+    cur, pending, box = h.undo(kept, lazy.IDENTITY)
+    assert np.array_equal(cur, frame()) and box == (256, 0, 512, 256)
+    cur, pending, box = h.redo(cur, pending)
+    assert cur[305, 15, 0] == 9 and box == (256, 0, 512, 256)
+    assert h.undo(*h.undo(cur, pending)[:2]) is None
+
+def test_crop_keeps_the_whole_frame():
+    h = History()
+    before = frame(5)
+    cur = h.push(before, before[100:200, 50:150].copy(), step('crop', box=[0.1, 0.2, 0.3, 0.4]))
+    cur, _, changed = h.undo(cur, lazy.IDENTITY)
+    assert cur.shape == before.shape and changed is True
+
+def test_new_edit_drops_the_redo_branch():
+    h = History(tile=256)
+    cur = frame()
+    for i in range(3):
+        after = cur.copy()
+        after[0, 0] = i + 1
+        cur = h.push(cur, after, step('bright', delta=i + 1))
+    cur = h.undo(h.undo(cur, lazy.IDENTITY)[0], lazy.IDENTITY)[0]
+    redo_bytes = h.nbytes
+    after = cur.copy()
+    after[-1, -1] = 50
+    cur = h.push(cur, after, step('invert'))
+    assert not h.can_redo() and h.nbytes < redo_bytes
+    assert h.recipe == [step('bright', delta=1), step('invert')]
+
+def test_budget_evicts_oldest_first():
+    h = History(budget=3 * 256 * 256 * 3, tile=256)
+    cur = frame()
+    for i in range(5):
+        after = cur.copy()
+        after[0, 0] = i + 1
+        cur = h.push(cur, after, step('invert'))
+    assert h.nbytes <= h.budget
+    undone = 0
+    while h.can_undo():
+        cur = h.undo(cur, lazy.IDENTITY)[0]
+        undone += 1
+    # The evicted steps are still in the image, and in the recipe
+    assert undone == 3 and cur[0, 0, 0] == 2 and len(h.recipe) == 2
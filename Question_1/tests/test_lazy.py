@@ -0,0 +1,79 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import image_ops
+import lazy
+from history import History
+from image_ops import step
+from pyramid import Pyramid
+
+FUSABLE = ['rotate_90', 'flip_h', 'flip_v', 'invert', 'brighten', 'darken', 'grayscale']
+
+@pytest.fixture
+def img():
+    return np.random.default_rng(0).integers(0, 256, (97, 131, 3), np.uint8)
+
+def frame(value=0, shape=(600, 500, 3)):
+    return np.full(shape, value, np.uint8)
+
+@pytest.mark.parametrize('ops', list(itertools.product(FUSABLE, repeat=3)))
+def test_lazy_matches_eager(img, ops):
+    steps = [step(op) for op in ops]
+    assert np.array_equal(lazy.apply_steps(img, steps), image_ops.apply_steps(img, steps))
+
+def test_lazy_breaks_runs_at_filters(img):
+    steps = image_ops.parse_ops('rotate_90,invert,blur,flip_h,sharpen,darken')
+    assert np.array_equal(lazy.apply_steps(img, steps), image_ops.apply_steps(img, steps))
+
+@pytest.mark.parametrize('ops', list(itertools.product(['rotate_90', 'flip_h', 'flip_v', 'invert'], repeat=3)))
+def test_pending_inverse_round_trips(img, ops):
+    pending = lazy.IDENTITY
+    for op in ops:
+        pending = pending.add(step(op))
+    assert np.array_equal(pending.inverse().apply(pending.apply(img)), img)
+
+def test_lossy_pending_has_no_inverse():
+    assert lazy.IDENTITY.add(step('grayscale')).inverse() is None
+    assert lazy.IDENTITY.add(step('brighten')).inverse() is None
+
+def test_view_shows_the_edited_window(img):
+    pending = lazy.IDENTITY.add(step('rotate_90')).add(step('flip_v')).add(step('darken'))
+    window = pending.view(Pyramid(img), 1.0, 20, 30, 50, 40)
+    assert np.array_equal(window, pending.apply(img)[30:70, 20:70])
+
+def test_fused_steps_cost_no_pixels():
+    h = History()
+    img = frame()
+    rotated = lazy.IDENTITY.add(step('rotate_90'))
+    h.push(img, img, step('rotate_90'), lazy.IDENTITY)
+    assert h.nbytes == 0
+    cur, pending, changed = h.undo(img, rotated)
+    assert cur is img and pending.is_identity and changed is False
+    assert h.redo(cur, pending)[1].key == rotated.key
+
+def test_flatten_of_reversible_edits_is_pixel_free():
+    h = History(tile=256)
+    rng = np.random.default_rng(1)
+    before = rng.integers(0, 256, (300, 200, 3), np.uint8)
+    pending = lazy.IDENTITY.add(step('rotate_90')).add(step('invert')).add(step('flip_h'))
+    flat = h.push(before, pending.apply(before), None, pending)
+    blurred = flat.copy()
+    blurred[:50] = 0
+    cur = h.push(flat, blurred.copy(), step('blur'))
+    flat_bytes = h.nbytes
+    cur, back, _ = h.undo(cur, lazy.IDENTITY)
+    assert np.array_equal(cur, before) and back.key == pending.key
+    cur, nxt, _ = h.redo(cur, back)
+    assert np.array_equal(cur, blurred) and nxt.is_identity
+    assert h.nbytes == flat_bytes   # only the blur's tiles
+
+def test_lossy_flatten_is_stored():
+    h = History(tile=256)
+    before = frame(200)
+    pending = lazy.IDENTITY.add(step('brighten'))
+    flat = h.push(before, pending.apply(before), None, pending)
+    assert h.nbytes > 0
+    cur, back, _ = h.undo(h.push(flat, flat.copy(), step('blur')), lazy.IDENTITY)
+    assert np.array_equal(cur, before) and back.key == pending.key
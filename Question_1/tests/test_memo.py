@@ -0,0 +1,49 @@
+import numpy as np
+
+import lazy
+import memo
+from history import History
+from image_ops import step
+
+def test_chain_key_follows_steps_and_order():
+    a, b = {'op': 'blur', 'ksize': 7}, {'op': 'invert'}
+    assert memo.chain_key([a, b]) == memo.chain_key([{'ksize': 7, 'op': 'blur'}, dict(b)])
+    assert memo.chain_key([a, b]) != memo.chain_key([b, a])
+    assert memo.chain_key([]) != memo.chain_key([b])
+
+def test_cache_is_bounded_by_bytes():
+    c = memo.ResultCache(budget=250)
+    for i in range(4):
+        c.put(i, np.zeros(100, np.uint8))
+    assert c.nbytes == 200 and c.get(0) is None and c.get(3) is not None
+    assert not c.compute(9, lambda: np.ones(10, np.uint8)).flags.writeable
+
+def test_release_falls_back_to_a_copy():
+    c = memo.ResultCache()
+    base = np.zeros(100, np.uint8)
+    base.flags.writeable = False
+    view = base[10:]
+    out = c.release(view)
+    assert out is not view and out.flags.writeable
+
+def test_digest_depends_on_pixels_and_shape(monkeypatch):
+    monkeypatch.setattr(memo, 'BAND', 1000)   # hash big frames in bands
+    img = np.zeros((100, 50, 3), np.uint8)
+    d = memo.digest(img)
+    assert d == memo.digest(img.copy())
+    assert d != memo.digest(img.reshape(50, 100, 3))
+    img[99, 49, 2] = 1
+    assert d != memo.digest(img)
+
+def test_read_only_frames_are_taken_back_from_the_cache():
+    cache = memo.ResultCache()
+    h = History(tile=256, own=cache.release)
+    before = np.zeros((600, 500, 3), np.uint8)
+    after = before.copy()
+    after[0, 0] = 7
+    after = cache.put('after', after)
+    cur = h.push(before, after, step('invert'))
+    assert not cur.flags.writeable
+    cur = h.undo(cur, lazy.IDENTITY)[0]
+    assert cur is after and cur[0, 0, 0] == 0
+    assert cache.get('after') is None and cache.nbytes == 0
@@ -0,0 +1,54 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+import previews
+import tiled
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    d = str(tmp_path / 'cache')
+    monkeypatch.setattr(previews, 'CACHE_DIR', d)
+    return d
+
+def test_image_size_follows_exif_orientation(tmp_path):
+    exif = Image.Exif()
+    exif[previews.EXIF_ORIENTATION] = 6   # stored sideways, shown rotated
+    path = str(tmp_path / 'portrait.jpg')
+    Image.new('RGB', (80, 60)).save(path, exif=exif)
+    assert previews.image_size(path) == (80, 60) == tiled.open_image(path).shape[:2]
+
+def test_big_jpeg_gets_a_reduced_decode(tmp_path, cache_dir):
+    path = str(tmp_path / 'big.jpg')
+    cv2.imwrite(path, np.full((2100, 1000, 3), 128, np.uint8))
+    shape = previews.image_size(path)
+    pre, hit = previews.preview(path, shape)
+    assert not hit and pre.shape == (1050, 500, 3)
+
+def test_stored_preview_is_used_until_the_file_changes(tmp_path, cache_dir):
+    path = str(tmp_path / 'a.png')
+    cv2.imwrite(path, np.zeros((3000, 200, 3), np.uint8))
+    assert previews.preview(path, (3000, 200)) == (None, False)
+    previews.store(path, np.zeros((3000, 200, 3), np.uint8))
+    pre, hit = previews.preview(path, (3000, 200))
+    assert hit and max(pre.shape[:2]) == previews.PREVIEW_SIDE
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert previews.cached(path) is None
+
+def test_npy_preview_is_strided(tmp_path, cache_dir):
+    path = str(tmp_path / 'scan.npy')
+    np.save(path, np.zeros((4096, 2048, 3), np.uint8))
+    assert previews.image_size(path) == (4096, 2048)
+    assert previews.decode(path, (4096, 2048)).shape == (1024, 512, 3)
+
+def test_cache_is_trimmed(tmp_path, cache_dir, monkeypatch):
+    monkeypatch.setattr(previews, 'CACHE_KEEP', 2)
+    for i in range(4):
+        path = str(tmp_path / f'{i}.png')
+        cv2.imwrite(path, np.zeros((4, 4, 3), np.uint8))
+        previews.store(path, np.zeros((4, 4, 3), np.uint8))
+    assert len(os.listdir(cache_dir)) == 2
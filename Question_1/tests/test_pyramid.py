@@ -0,0 +1,32 @@
+import numpy as np
+
+from pyramid import Pyramid
+
+def test_patched_levels_match_a_rebuild():
+    rng = np.random.default_rng(2)
+    img = rng.integers(0, 256, (517, 389, 3), np.uint8)
+    p = Pyramid(img)
+    p.level(4)
+    img[101:230, 77:300] = rng.integers(0, 256, (129, 223, 3), np.uint8)
+    p.set(img, (101, 77, 230, 300))
+    fresh = Pyramid(img)
+    fresh.level(4)
+    assert len(p.levels) == len(fresh.levels)
+    for a, b in zip(p.levels, fresh.levels):
+        assert np.array_equal(a, b)
+
+def test_new_shape_drops_levels():
+    p = Pyramid(np.zeros((256, 256, 3), np.uint8))
+    p.level(2)
+    p.set(np.zeros((128, 256, 3), np.uint8), (0, 0, 10, 10))
+    assert len(p.levels) == 1
+
+def test_view_renders_only_the_window():
+    img = np.random.default_rng(3).integers(0, 256, (400, 600, 3), np.uint8)
+    p = Pyramid(img)
+    # At 100% the window is the pixels under it
+    assert np.array_equal(p.view(1.0, 120, 50, 200, 100), img[50:150, 120:320])
+    # Zoomed out, the view comes from a smaller level and is only w×h
+    out = p.view(0.2, 10, 5, 64, 48)
+    assert out.shape == (48, 64, 3) and p.pick(0.2) == 2
+    assert len(p.levels) == 3
@@ -0,0 +1,55 @@
+import threading
+import time
+
+import pytest
+
+from tasks import TaskRunner
+
+@pytest.fixture
+def runner(tk_root):
+    status = []
+    return tk_root, status, TaskRunner(tk_root, status.append, poll=1)
+
+def test_jobs_run_in_order_and_report_on_the_tk_thread(runner):
+    root, status, tasks = runner
+    seen = []
+    tk = threading.get_ident()
+    for i in range(3):
+        tasks.submit(lambda t, i=i: i * 10,
+                     lambda r: seen.append((r, threading.get_ident() == tk)))
+    root.pump(lambda: not tasks.busy())
+    assert seen == [(0, True), (10, True), (20, True)]
+
+def test_next_job_waits_for_the_previous_done(runner):
+    root, status, tasks = runner
+    state = {'n': 0}
+    def done(_):
+        state['n'] += 1
+    for _ in range(3):
+        tasks.submit(lambda t: state['n'], done)
+    results = []
+    tasks.submit(lambda t: state['n'], results.append)
+    root.pump(lambda: not tasks.busy())
+    assert results == [3]
+
+def test_failing_callback_keeps_the_loop_alive(runner):
+    root, status, tasks = runner
+    seen = []
+    tasks.submit(None, lambda r: 1 / 0, 'Broken', always=lambda: seen.append('always'))
+    tasks.submit(lambda t: 'next', seen.append)
+    root.pump(lambda: not tasks.busy())
+    assert seen == ['always', 'next']
+    assert any(s.startswith('Broken failed') for s in status)
+
+def test_cancel_skips_done_but_runs_always(runner):
+    root, status, tasks = runner
+    seen = []
+    def work(task):
+        while True:
+            task.progress(0.5)
+            time.sleep(0.001)
+    t = tasks.submit(work, seen.append, 'Slow', always=lambda: seen.append('always'))
+    root.pump(lambda: tasks.running is t and any('50%' in s for s in status))
+    tasks.cancel()
+    root.pump(lambda: not tasks.busy())
+    assert seen == ['always'] and 'Slow cancelled' in status
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+import image_ops
+import tiled
+from image_ops import step
+
+@pytest.fixture
+def img():
+    return np.random.default_rng(0).integers(0, 256, (97, 131, 3), np.uint8)
+
+@pytest.fixture
+def small_tiles(monkeypatch):
+    """Every frame counts as large and is cut into odd-sized tiles"""
+    monkeypatch.setattr(tiled, 'LARGE', 1)
+    monkeypatch.setattr(tiled, 'TILE', 24)
+
+@pytest.mark.parametrize('s', [step('blur'), step('blur', ksize=15), step('sharpen'), step('invert'),
+                               step('grayscale'), step('rotate_90'), step('bright', delta=-40),
+                               step('crop', box=[0.1, 0.2, 0.7, 0.9])])
+def test_tiled_step_matches_whole_frame(img, small_tiles, s):
+    out = tiled.apply_step(img, s)
+    assert np.array_equal(out, image_ops.apply_step(img, s))
+
+def test_tiled_steps_match_whole_frame(img, small_tiles):
+    steps = image_ops.parse_ops('rotate_90,flip_v,blur,invert,grayscale,sharpen,brighten')
+    assert np.array_equal(tiled.apply_steps(img, steps), image_ops.apply_steps(img, steps))
+
+def test_large_frames_live_in_scratch_files(img, small_tiles):
+    assert isinstance(tiled.new_buffer(img.shape), np.memmap)
+    assert isinstance(tiled.copy(img), np.memmap)
+
+def test_open_scan_rejects_other_arrays(tmp_path):
+    path = tmp_path / 'scan.npy'
+    np.save(path, np.zeros((8, 8), np.float32))
+    with pytest.raises(ValueError, match='expected H×W×3 uint8'):
+        tiled.open_scan(str(path))
+    np.save(path, np.zeros((8, 8, 3), np.uint8))
+    assert tiled.open_scan(str(path)).shape == (8, 8, 3)
@@ -0,0 +1,32 @@
+import json
+
+import bench_ops
+from timing import Timings
+
+def test_disabled_timings_record_nothing():
+    t = Timings()
+    with t.span('blur'):
+        pass
+    assert not t.events and t.describe('blur') == ''
+
+def test_trace_keeps_the_last_spans_and_counts_the_rest(tmp_path):
+    t = Timings(enabled=True, keep=3)
+    for name in 'abcde':
+        with t.span(name):
+            pass
+    assert t.dropped == 2
+    path = str(tmp_path / 'trace.json')
+    assert t.dump(path) == 3
+    events = json.load(open(path))['traceEvents']
+    assert [e['name'] for e in events] == ['c', 'd', 'e']
+    assert all(e['ph'] == 'X' and e['dur'] >= 0 for e in events)
+    assert t.describe('e', 'zzz').startswith('e ')
+
+def test_benchmark_runs_only_dtype_safe_cases():
+    logs = []
+    res = bench_ops.run([(64, 48)], ['uint8', 'float32'], ['invert', 'blur', 'digest'], 1, logs.append)
+    assert set(res) == {'invert@64x48/uint8', 'blur@64x48/uint8', 'digest@64x48/uint8',
+                        'blur@64x48/float32', 'digest@64x48/float32'}
+    assert all(r['ms'] > 0 and r['mpps'] > 0 for r in res.values())
+    slow = bench_ops.compare(res, {k: dict(v, ms=v['ms'] / 10) for k, v in res.items()}, 1.5, logs.append)
+    assert sorted(slow) == sorted(res)
@@ -0,0 +1,185 @@
+import argparse
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+import image_ops
+import lazy
+
+# -------------------------
+# Tiled processing for images too big to handle as one array
+# -------------------------
+# Frames above LARGE bytes are kept in unlinked scratch files (np.memmap), so
+# the OS pages them in and out instead of the editor running out of RAM.
+# Filters read each tile plus a halo as wide as the kernel radius; at the
+# image edge the halo is cut off and OpenCV's own border handling applies,
+# so the tiled result is identical to filtering the whole frame at once.
+
+TILE = 1024
+LARGE = 64 * 2**20
+SCRATCH_DIR = None   # None: the system temp directory
+
+# Kernel radius of each operation that works on its own neighbourhood
+HALO = {
+    'blur': lambda s: s.get('ksize', 7)//2,
+    'sharpen': 1,
+    'grayscale': 0,
+    'invert': 0,
+    'brighten': 0,
+    'darken': 0,
+    'bright': 0,
+}
+
+def halo(s):
+    h = HALO[s['op']]
+    return h(s) if callable(h) else h
+
+def is_large(img):
+    return img.nbytes >= LARGE
+
+def new_buffer(shape, dtype=np.uint8):
+    """Array for a result; big ones live in a scratch file that vanishes with them"""
+    n = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    if n < LARGE:
+        return np.empty(shape, dtype)
+    return np.memmap(tempfile.TemporaryFile(dir=SCRATCH_DIR), dtype, 'w+', shape=shape)
+
+def tiles(h, w, tile=None):
+    tile = tile or TILE
+    for y in range(0, h, tile):
+        for x in range(0, w, tile):
+            yield y, x, min(tile, h-y), min(tile, w-x)
+
+def run_tiles(fn, jobs, workers=None, progress=None):
+    """Call fn(y, x, th, tw) for every tile on a thread pool (OpenCV drops the GIL)"""
+    jobs = list(jobs)
+    with ThreadPoolExecutor(workers) as ex:
+        futs = [ex.submit(fn, *j) for j in jobs]
+        try:
+            for i, f in enumerate(as_completed(futs), 1):
+                f.result()
+                if progress: progress(i/len(futs))
+        except BaseException:
+            for f in futs: f.cancel()
+            raise
+
+def filter_tiled(src, func, halo=0, dst=None, tile=None, workers=None, progress=None):
+    h,w = src.shape[:2]
+    if dst is None: dst = new_buffer(src.shape, src.dtype)
+    def one(y, x, th, tw):
+        y0,x0 = max(0,y-halo), max(0,x-halo)
+        y1,x1 = min(h,y+th+halo), min(w,x+tw+halo)
+        out = func(np.ascontiguousarray(src[y0:y1, x0:x1]))
+        dst[y:y+th, x:x+tw] = out[y-y0:y-y0+th, x-x0:x-x0+tw]
+    run_tiles(one, tiles(h, w, tile), workers, progress)
+    return dst
+
+def pending_tiled(src, pending, dst=None, tile=None, workers=None, progress=None):
+    """Materialize fused edits; each output tile is built from its own source window"""
+    oh,ow = pending.shape(src.shape)
+    if dst is None: dst = new_buffer((oh, ow) + src.shape[2:], src.dtype)
+    def one(y, x, th, tw):
+        sx,sy,sw,sh = pending.source_window(ow, oh, x, y, tw, th)
+        dst[y:y+th, x:x+tw] = pending.apply(np.ascontiguousarray(src[sy:sy+sh, sx:sx+sw]))
+    run_tiles(one, tiles(oh, ow, tile), workers, progress)
+    return dst
+
+def half(src, tile=None, workers=None):
+    """Half-size copy for the display pyramid, built tile by tile"""
+    h,w = src.shape[:2]
+    dst = new_buffer((h//2, w//2) + src.shape[2:], src.dtype)
+    def one(y, x, th, tw):
+        th,tw = th//2, tw//2
+        if th and tw:
+            dst[y//2:y//2+th, x//2:x//2+tw] = cv2.resize(
+                np.ascontiguousarray(src[y:y+2*th, x:x+2*tw]), (tw, th), interpolation=cv2.INTER_AREA)
+    run_tiles(one, tiles(h, w, tile), workers)
+    return dst
+
+def copy(img):
+    return filter_tiled(img, lambda t: t) if is_large(img) else img.copy()
+
+def apply_pending(img, pending, progress=None):
+    """Pending.apply, tiled for large frames"""
+    if pending.is_identity: return img
+    if not is_large(img): return pending.apply(img)
+    return pending_tiled(img, pending, progress=progress)
+
+def apply_step(img, s, progress=None):
+    """image_ops.apply_step, tiled for large frames"""
+    if not is_large(img):
+        return image_ops.apply_step(img, s)
+    if s['op'] in HALO:
+        return filter_tiled(img, lambda t: image_ops.apply_step(t, s), halo(s), progress=progress)
+    pending = lazy.IDENTITY.add(s)
+    if pending is not None:
+        return pending_tiled(img, pending, progress=progress)
+    # Crop (and anything else): compute, then copy the result out tile by tile
+    return filter_tiled(image_ops.apply_step(img, s), lambda t: t, progress=progress)
+
+def apply_steps(img, steps, progress=None):
+    """lazy.apply_steps, tiled for large frames"""
+    pending = lazy.IDENTITY
+    for s in steps:
+        nxt = pending.add(s)
+        if nxt is None:
+            img = apply_step(apply_pending(img, pending, progress), s, progress)
+            nxt = lazy.IDENTITY
+        pending = nxt
+    return apply_pending(img, pending, progress)
+
+def open_scan(path, mode='c'):
+    """Memory-mapped .npy scan, checked to be an H×W×3 uint8 RGB frame"""
+    img = np.load(path, mmap_mode=mode)
+    if img.ndim != 3 or img.shape[2] != 3 or img.dtype != np.uint8:
+        shape = '×'.join(map(str, img.shape))
+        raise ValueError(f'{os.path.basename(path)} holds a {shape} {img.dtype} array, expected H×W×3 uint8 RGB')
+    return img
+
+def open_image(path):
+    """RGB frame for path; .npy scans are memory-mapped, other formats are decoded
+    whole (so need the RAM once) and moved to scratch if big"""
+    if path.lower().endswith('.npy'):
+        # Copy-on-write: edits never reach the file, untouched pages stay on disk
+        return open_scan(path)
+    img = cv2.imread(path)
+    if img is None: return None
+    cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
+    return copy(img) if is_large(img) else img
+
+def save_image(path, img, progress=None):
+    if path.lower().endswith('.npy'):
+        out = np.lib.format.open_memmap(path, 'w+', img.dtype, img.shape)
+        filter_tiled(img, lambda t: t, dst=out, progress=progress)
+        out.flush()
+        return True
+    out = filter_tiled(img, lambda t: cv2.cvtColor(t, cv2.COLOR_RGB2BGR), progress=progress)
+    return cv2.imwrite(path, out)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Apply editor operations to one huge image, tile by tile')
+    ap.add_argument('src', help='input image or .npy scan')
+    ap.add_argument('dst', help='output image or .npy')
+    ap.add_argument('--ops', required=True, help='comma separated operations, e.g. blur,sharpen')
+    args = ap.parse_args(argv)
+
+    try:
+        img = open_image(args.src)
+    except ValueError as e:
+        print(e)
+        return 1
+    if img is None:
+        print(f'Cannot read {args.src}')
+        return 1
+    show = lambda f: print(f'\r{int(f*100)}%', end='', flush=True)
+    img = apply_steps(img, image_ops.parse_ops(args.ops), show)
+    ok = save_image(args.dst, img, show)
+    print(f'\rSaved {os.path.basename(args.dst)}' if ok else f'\rCould not write {args.dst}')
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,48 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# -------------------------
+# Optional per-operation timing for the editor
+# -------------------------
+# Spans are only recorded while `enabled` is set; otherwise span() is a bare
+# generator round trip. Only the last `keep` spans are kept (`dropped`
+# counts the rest); dump() writes them in the Chrome trace format, which
+# opens in chrome://tracing or https://ui.perfetto.dev.
+
+class Timings:
+    def __init__(self, enabled=False, keep=100000):
+        self.enabled = enabled
+        self.events = deque(maxlen=keep)
+        self.dropped = 0
+        self.last = {}
+        self.t0 = time.perf_counter()
+
+    @contextmanager
+    def span(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.last[name] = end - start
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append((name, start, end, threading.get_ident()))
+
+    def describe(self, *names):
+        """'Blur 41.7 ms · draw 3.2 ms' for the names that have been timed"""
+        return ' · '.join(f'{n} {self.last[n]*1000:.1f} ms' for n in names if n in self.last)
+
+    def dump(self, path):
+        events = [{'name': n, 'ph': 'X', 'pid': 1, 'tid': tid,
+                   'ts': (s-self.t0)*1e6, 'dur': (e-s)*1e6}
+                  for n, s, e, tid in self.events]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return len(events)
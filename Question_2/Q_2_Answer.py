@@ -1,81 +1,213 @@
+import argparse
+import heapq
+import os
 import pygame
 import sys
+import time
+
+from entities import Enemies, Projectiles, resolve_hits
+import levels
+import replay
+from hud import HUD
+from pool import Pool
+from profiler import Profiler
+from render import StaticLayer, display_format, shared_surface
+from spatial import SpatialGroup
+from timing import Timings
 
 # Theme: Animal vs Humans – Hero is a rabbit, enemies are wolves
 # Game Title: Forest Guardian
 
 # Screen dimensions
 SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
-FPS = 60
+FPS = 60   # render cap; 0 draws as fast as possible
+
+# Fixed simulation rate: movement constants are per step, whatever the frame rate
+SIM_RATE = 60
+STEP = 1 / SIM_RATE
+# Most steps run before a draw; further backlog is dropped (the game slows
+# down instead of freezing while it catches up)
+MAX_STEPS_PER_FRAME = 5
+# Moves longer than this in one step (wrap-around, respawn) are not interpolated
+SNAP_DISTANCE = 100
 
 # Level width for wrap-around
 LEVEL_WIDTH = 2000
 
+# Level chunks are kept loaded this far beyond the screen edges
+STREAM_MARGIN = SCREEN_WIDTH
+
 # Camera smoothing factor
 CAMERA_SMOOTHING = 0.1
 
 # Notification duration before boss appears (seconds)
 BOSS_ALERT_DURATION = 2
 
-# Draw health bars
+# Profiler overlay and trace export keys, and where F4 writes the trace
+PROFILER_KEY = pygame.K_F3
+TRACE_KEY = pygame.K_F4
+TRACE_PATH = 'forest_guardian_trace.json'
+
+# Health bars: one cached surface per fill length
+_health_bars = {}
+
+def health_bar(current, maximum, bar_width=50, bar_height=5):
+    fill = int(bar_width * (current / maximum if maximum > 0 else 0))
+    key = (bar_width, bar_height, fill)
+    bar = _health_bars.get(key)
+    if bar is None:
+        bar = _health_bars[key] = display_format(pygame.Surface((bar_width, bar_height)))
+        bar.fill((255, 0, 0))
+        bar.fill((0, 255, 0), (0, 0, fill, bar_height))
+    return bar
+
 def draw_health_bar(surface, x, y, current, maximum, bar_width=50, bar_height=5):
-    ratio = current / maximum if maximum > 0 else 0
-    pygame.draw.rect(surface, (255, 0, 0), (x, y, bar_width, bar_height))
-    pygame.draw.rect(surface, (0, 255, 0), (x, y, int(bar_width * ratio), bar_height))
+    surface.blit(health_bar(current, maximum, bar_width, bar_height), (x, y))
 
 class CameraGroup(pygame.sprite.Group):
-    def __init__(self):
+    def __init__(self, timings=None):
         super().__init__()
+        self.timings = timings or Timings()
         self.offset = pygame.Vector2(0, 0)
         self.smoothing = CAMERA_SMOOTHING
+        # Ground that never moves is drawn from cached chunks, not as sprites
+        self.static = StaticLayer()
+        self.prev_offset = pygame.Vector2(0, 0)
+        # Draw order by centery, re-sorted only when members change or move out of order
+        self._order = []
+        self._dirty = False
+        # Entity stores drawn along with the sprites
+        self.stores = []
+
+    def add_static(self, *sprites):
+        self.static.add(*sprites)
 
-    def custom_draw(self, player):
+    def remove_static(self, *sprites):
+        self.static.remove(*sprites)
+
+    def add_store(self, store):
+        self.stores.append(store)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite)
+        self._dirty = True
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self._dirty = True
+
+    def empty(self):
+        super().empty()
+        self.static.clear()
+        self.stores.clear()
+
+    def snapshot(self):
+        """Remember positions before a simulation step, to interpolate from"""
+        self.prev_offset.update(self.offset)
+        for s in self.sprites():
+            s.prev = s.rect.topleft
+        for store in self.stores:
+            store.snapshot()
+
+    def follow(self, player):
+        """Move the camera towards the player; once per simulation step"""
         target_x = player.rect.centerx - SCREEN_WIDTH // 2
         target_y = player.rect.centery - SCREEN_HEIGHT // 2
         self.offset.x += (target_x - self.offset.x) * self.smoothing
         self.offset.y += (target_y - self.offset.y) * self.smoothing
-        for sprite in sorted(self.sprites(), key=lambda s: s.rect.centery):
-            offset_rect = sprite.rect.copy()
-            offset_rect.topleft -= self.offset
-            screen.blit(sprite.image, offset_rect)
-            if hasattr(sprite, 'health') and hasattr(sprite, 'max_health'):
-                draw_health_bar(screen,
-                                offset_rect.x,
-                                offset_rect.y - 10,
-                                sprite.health,
-                                sprite.max_health)
+
+    def custom_draw(self, surface, player, alpha=1.0):
+        """Draw the world onto `surface`, `alpha` of the way from the previous step to the current one"""
+        offset = self.prev_offset.lerp(self.offset, alpha)
+        ox, oy = round(offset.x), round(offset.y)
+        view = pygame.Rect(ox, oy, SCREEN_WIDTH, SCREEN_HEIGHT)
+        # Room above each sprite for its health bar, and for the interpolation
+        view.inflate_ip(2 * SNAP_DISTANCE, 2 * SNAP_DISTANCE + 20)
+        with self.timings.span('cull'):
+            if self._dirty:
+                self._order = sorted(self.sprites(), key=lambda s: s.rect.centery)
+                self._dirty = False
+            visible = [s for s in self._order if view.colliderect(s.rect)]
+            if any(a.rect.centery > b.rect.centery for a, b in zip(visible, visible[1:])):
+                # Nearly sorted already, so this is close to linear
+                self._order.sort(key=lambda s: s.rect.centery)
+                visible = [s for s in self._order if view.colliderect(s.rect)]
+            items = []
+            for sprite in visible:
+                r = sprite.rect
+                px, py = sprite.prev
+                dx, dy = r.x - px, r.y - py
+                if abs(dx) > SNAP_DISTANCE or abs(dy) > SNAP_DISTANCE:
+                    dx, dy = 0, 0
+                    px, py = r.topleft
+                bar = (sprite.health, sprite.max_health) if hasattr(sprite, 'max_health') else None
+                items.append((r.centery, sprite.image, (px + round(dx * alpha) - ox, py + round(dy * alpha) - oy), bar))
+            # Each list is sorted by centery already
+            layers = [items] + [s.visible(view, ox, oy, alpha, SNAP_DISTANCE) for s in self.stores]
+        with self.timings.span('merge'):
+            batch = self.static.visible(view, ox, oy)
+            for _, image, (x, y), bar in heapq.merge(*layers, key=lambda t: t[0]):
+                batch.append((image, (x, y)))
+                if bar:
+                    batch.append((health_bar(*bar), (x, y - 10)))
+        with self.timings.span('blits'):
+            surface.blits(batch, doreturn=False)
 
 class GameObject(pygame.sprite.Sprite):
+    pool = None   # set when made by a Pool; kill() hands it back
+
     def __init__(self, x, y, w, h, color):
         super().__init__()
-        self.image = pygame.Surface((w, h))
-        self.image.fill(color)
+        # Objects that look alike share one surface
+        self.image = shared_surface((w, h), color)
         self.rect = self.image.get_rect(topleft=(x, y))
+        self.prev = self.rect.topleft
+
+    def place(self, x, y, w=None, h=None, color=None):
+        """Put back into play from a pool, with the same arguments as __init__"""
+        if color is not None:
+            self.image = shared_surface((w, h), color)
+            self.rect = self.image.get_rect(topleft=(x, y))
+        else:
+            self.rect.topleft = (x, y)
+        self.prev = self.rect.topleft
+
+    def kill(self):
+        was_alive = self.alive()
+        super().kill()
+        if was_alive and self.pool is not None:
+            self.pool.release(self)
 
 class Player(GameObject):
+    # Read when a player is made (every restart); sim.py --set can change them
+    SPEED = 5
+    JUMP_POWER = -20
+    GRAVITY = 0.7
+    MAX_HEALTH = 100
+    LIVES = 3
+
     def __init__(self, x, y):
         super().__init__(x, y, 40, 60, (200, 200, 255))
         self.vel = pygame.Vector2(0, 0)
-        self.speed = 5
-        self.jump_power = -20
-        self.gravity = 0.7
-        self.max_health = 100
-        self.health = 100
-        self.lives = 3
+        self.speed = self.SPEED
+        self.jump_power = self.JUMP_POWER
+        self.gravity = self.GRAVITY
+        self.max_health = self.MAX_HEALTH
+        self.health = self.MAX_HEALTH
+        self.lives = self.LIVES
         self.on_ground = False
         self.facing = 1
 
-    def update(self, platforms):
-        keys = pygame.key.get_pressed()
-        # Compute horizontal velocity
-        self.vel.x = (keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]) * self.speed
+    def update(self, platforms, controls=0):
+        # Compute horizontal velocity from the replay.* bits held this step
+        self.vel.x = (bool(controls & replay.RIGHT) - bool(controls & replay.LEFT)) * self.speed
         # Update facing based on movement direction
         if self.vel.x > 0:
             self.facing = 1
         elif self.vel.x < 0:
             self.facing = -1
         # Jump
-        if keys[pygame.K_SPACE] and self.on_ground:
+        if controls & replay.JUMP and self.on_ground:
             self.vel.y = self.jump_power
         # Apply gravity
         self.vel.y += self.gravity
@@ -86,182 +218,373 @@ class Player(GameObject):
         self._collide(platforms, 'vertical')
 
     def _collide(self, platforms, direction):
-        for p in platforms:
-            if self.rect.colliderect(p.rect):
-                if direction == 'horizontal':
-                    if self.vel.x > 0:
-                        self.rect.right = p.rect.left
-                    elif self.vel.x < 0:
-                        self.rect.left = p.rect.right
-                else:
-                    if self.vel.y > 0:
-                        self.rect.bottom = p.rect.top
-                        self.vel.y = 0
-                        self.on_ground = True
-                    elif self.vel.y < 0:
-                        self.rect.top = p.rect.bottom
-                        self.vel.y = 0
+        # Only platforms in the grid cells around the player. Resolving one contact
+        # moves the player, possibly onto a platform the last query did not cover,
+        # so query again after every move; each platform is resolved at most once
+        resolved = set()
+        while True:
+            p = next((p for p in platforms.collide(self) if p not in resolved), None)
+            if p is None: break
+            resolved.add(p)
+            if direction == 'horizontal':
+                if self.vel.x > 0:
+                    self.rect.right = p.rect.left
+                elif self.vel.x < 0:
+                    self.rect.left = p.rect.right
+            else:
+                if self.vel.y > 0:
+                    self.rect.bottom = p.rect.top
+                    self.vel.y = 0
+                    self.on_ground = True
+                elif self.vel.y < 0:
+                    self.rect.top = p.rect.bottom
+                    self.vel.y = 0
         if direction == 'vertical' and self.vel.y != 0:
             self.on_ground = False
 
-class Projectile(GameObject):
-    def __init__(self, x, y, direction):
-        super().__init__(x, y, 10, 5, (255, 165, 0))
-        self.vel = 12 * direction
-        self.damage = 25
-
-    def update(self):
-        self.rect.x += self.vel
-        if self.rect.right < 0 or self.rect.left > LEVEL_WIDTH:
-            self.kill()
-
-class Enemy(GameObject):
-    def __init__(self, x, y, is_boss=False, direction=-1):
-        size = (60, 80) if is_boss else (30, 50)
-        color = (50, 50, 50) if is_boss else (100, 100, 100)
-        super().__init__(x, y, size[0], size[1], color)
-        self.max_health = 150 if is_boss else 50
-        self.health = self.max_health
-        self.speed = 2
-        self.direction = direction
-        self.is_boss = is_boss
-        self.active = True
-
-    def update(self):
-        self.rect.x += self.speed * self.direction
-        if self.rect.right < 0:
-            self.rect.left = LEVEL_WIDTH
-        elif self.rect.left > LEVEL_WIDTH:
-            self.rect.right = 0
-
 class Collectible(GameObject):
+    HEAL = 30
+
     def __init__(self, x, y):
         super().__init__(x, y, 20, 20, (255, 255, 0))
         self.kind = 'health'
 
     def apply(self, player):
-        player.health = min(player.max_health, player.health + 30)
+        player.health = min(player.max_health, player.health + self.HEAL)
         self.kill()
 
 class Level:
-    def __init__(self, num, all_sprites, platforms, enemies, collectibles):
-        for i in range(0, LEVEL_WIDTH, 200):
-            p = GameObject(i, SCREEN_HEIGHT - 40, 200, 40, (34, 139, 34))
-            platforms.add(p);
-            all_sprites.add(p)
-        if num < 3:
-            for i in range(3 * num):
-                e = Enemy(400 + i * 200, SCREEN_HEIGHT - 100)
-                enemies.add(e);
-                all_sprites.add(e)
-        else:
-            boss = Enemy(LEVEL_WIDTH + 100, SCREEN_HEIGHT - 140, is_boss=True, direction=-1)
-            enemies.add(boss);
-            all_sprites.add(boss)
-        for i in range(2):
-            c = Collectible(300 + i * 600, SCREEN_HEIGHT - 120)
-            collectibles.add(c);
-            all_sprites.add(c)
-
-class Game:
-    def __init__(self):
-        pygame.init()
-        global screen
-        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption('Forest Guardian')
-        self.clock = pygame.time.Clock()
+    """Streams a level file: only the chunks near the camera exist as sprites,
+    picked-up health packs stay gone. Wolves all go into the entity store.
+    Health packs left lying around go with the level when the next one loads."""
+    def __init__(self, data, all_sprites, platforms, enemies, collectibles, pools):
+        self.data = data
+        self.width = data.width
+        self.all_sprites, self.platforms = all_sprites, platforms
+        self.collectibles, self.pools = collectibles, pools
+        self.resident = {}      # chunk -> (platforms, collectibles)
+        self.taken = set()      # (chunk, record) of collected items
+        for kind, direction, w, h, x, y in data.actors.tolist():
+            enemies.spawn(x, y, is_boss=kind == levels.BOSS, direction=direction)
+
+    def _around(self, x0, x1):
+        c = self.data.chunk
+        return range(max(0, int(x0 - STREAM_MARGIN) // c),
+                     min(self.data.n - 1, int(x1 + STREAM_MARGIN) // c) + 1)
+
+    def update(self, camera_x, player_x):
+        # The camera pans back to the player after a restart or level change,
+        # so the ground under the player is needed before the camera is there
+        want = self._around(camera_x, camera_x + SCREEN_WIDTH)
+        near = self._around(player_x, player_x)
+        if near and not (want.start <= near.start and near.stop <= want.stop):
+            want = sorted(set(want) | set(near))
+        for i in [i for i in self.resident if i not in want]:
+            self._unload(i)
+        for i in want:
+            if i not in self.resident:
+                self._load(i)
+        if want:
+            # Read ahead on both sides while the player walks
+            self.data.prefetch(want[0] - 1)
+            self.data.prefetch(want[-1] + 1)
+
+    def _load(self, i):
+        plats, items = [], []
+        for j, (kind, _, w, h, x, y) in enumerate(self.data.read(i).tolist()):
+            if kind == levels.PLATFORM:
+                plats.append(self.pools['platform'].acquire(x, y, w, h, (34, 139, 34)))
+            elif kind == levels.COLLECTIBLE:
+                if (i, j) not in self.taken:
+                    c = self.pools['collectible'].acquire(x, y)
+                    c.key = (i, j)
+                    items.append(c)
+        self.platforms.add(plats)
+        self.all_sprites.add_static(*plats)
+        self.collectibles.add(items)
+        self.all_sprites.add(items)
+        self.resident[i] = (plats, items)
+
+    def _unload(self, i):
+        plats, items = self.resident.pop(i)
+        self.all_sprites.remove_static(*plats)
+        for s in plats + items:
+            s.kill()
+
+    def take(self, collectible):
+        """Call before collectible.kill(): the pool may hand it to another chunk next"""
+        self.taken.add(collectible.key)
+        self.resident[collectible.key[0]][1].remove(collectible)
+
+    def close(self):
+        for i in list(self.resident):
+            self._unload(i)
+        self.data.close()
+
+class World:
+    """The game without a window: state, rules and step(controls). Needs no
+    pygame.init(), so many can run side by side (see sim.py)"""
+    def __init__(self, level_dir=None, prefetch=True, timings=None):
+        self.timings = timings or Timings()
+        # level1.fgl ... in level_dir (see levels.py), or the built-in levels
+        self.level_dir = level_dir
+        self.prefetch = prefetch
+        self.level = None
         self.score = 0
         self.state = 'PLAY'
-        self.camera_group = CameraGroup()
+        self.camera_group = CameraGroup(self.timings)
+        # Entities are recycled across levels and restarts
+        self.pools = {'platform': Pool(GameObject), 'collectible': Pool(Collectible)}
+        self.enemies = Enemies()
+        self.projectiles = Projectiles()
+        # Groups that are collided against keep a spatial hash of their members
+        self.platforms = SpatialGroup(LEVEL_WIDTH)
+        self.collectibles = SpatialGroup(LEVEL_WIDTH)
         self.reset()
 
     def reset(self):
         self.score = 0
         self.state = 'PLAY'
+        if self.level is not None:
+            self.level.close()
+            self.level = None
         self.camera_group.empty()
-        self.platforms = pygame.sprite.Group()
-        self.enemies = pygame.sprite.Group()
-        self.collectibles = pygame.sprite.Group()
+        self.platforms.empty()
+        self.collectibles.empty()
+        # Enemies and projectiles are rows of arrays, updated all at once
+        self.enemies.clear()
+        self.projectiles.clear()
+        for pool in self.pools.values():
+            pool.reclaim()
+        self.camera_group.add_store(self.enemies)
+        self.camera_group.add_store(self.projectiles)
         self.player = Player(100, SCREEN_HEIGHT - 100)
         self.camera_group.add(self.player)
-        self.projectiles = pygame.sprite.Group()
         self.level_no = 1
-        self.boss_timer = BOSS_ALERT_DURATION * FPS
+        self.boss_timer = round(BOSS_ALERT_DURATION * SIM_RATE)   # in steps
         self.load_level()
 
     def load_level(self):
-        Level(self.level_no, self.camera_group, self.platforms, self.enemies, self.collectibles)
+        if self.level is not None:
+            self.level.close()
+        if self.level_dir:
+            data = levels.LevelFile(os.path.join(self.level_dir, f'level{self.level_no}.fgl'), self.prefetch)
+        else:
+            data = levels.LevelFile(levels.encode(LEVEL_WIDTH, levels.builtin(self.level_no, LEVEL_WIDTH, SCREEN_HEIGHT)),
+                                    self.prefetch)
+        self.level_width = data.width
+        # Only the current level is in the groups now, so the grids can match its width
+        self.platforms.set_width(data.width)
+        self.collectibles.set_width(data.width)
+        self.level = Level(data, self.camera_group, self.platforms, self.enemies, self.collectibles, self.pools)
+        self.level.update(self.camera_group.offset.x, self.player.rect.centerx)
 
-    def run(self):
-        while True:
-            self.clock.tick(FPS)
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_f and self.state == 'PLAY':
-                        offset = (self.player.rect.width // 2 + 5) * self.player.facing
-                        proj = Projectile(self.player.rect.centerx + offset,
-                                           self.player.rect.centery,
-                                           self.player.facing)
-                        self.camera_group.add(proj)
-                        self.projectiles.add(proj)
-                    if event.key == pygame.K_r and self.state == 'GAMEOVER':
-                        self.reset()
-            if self.state == 'PLAY':
-                self.update()
-            self.draw()
+    def pool_stats(self):
+        """Allocation counters of every pool, by name"""
+        stats = {name: pool.stats() for name, pool in self.pools.items()}
+        stats['enemies'] = self.enemies.stats()
+        stats['projectiles'] = self.projectiles.stats()
+        return stats
+
+    def close(self):
+        """Let go of the level file and its read-ahead thread"""
+        if self.level is not None:
+            self.level.close()
+            self.level = None
+
+    @property
+    def cleared(self):
+        """The boss is beaten"""
+        return self.state == 'GAMEOVER' and self.player.lives > 0
 
-    def update(self):
-        self.player.update(self.platforms)
-        self.projectiles.update()
-        self.enemies.update()
-        for p in self.projectiles:
-            hit = pygame.sprite.spritecollideany(p, self.enemies)
-            if hit:
-                hit.health -= p.damage
-                p.kill()
-                if hit.health <= 0:
-                    hit.kill()
-                    self.score += 200 if hit.is_boss else 50
-        if pygame.sprite.spritecollideany(self.player, self.enemies):
-            self.player.health -= 1
-            if self.player.health <= 0:
-                self.player.lives -= 1
-                self.player.health = self.player.max_health
-                if self.player.lives <= 0:
-                    self.state = 'GAMEOVER'
-        for c in pygame.sprite.spritecollide(self.player, self.collectibles, False):
-            c.apply(self.player)
-            self.score += 25
-        if not any(not en.is_boss for en in self.enemies) and self.level_no < 3:
-            self.level_no += 1
-            self.load_level()
-            self.player.rect.topleft = (100, SCREEN_HEIGHT - 100)
-        if self.level_no == 3 and self.boss_timer > 0:
-            self.boss_timer -= 1
-        if self.level_no == 3 and not any(en.is_boss for en in self.enemies):
-            self.state = 'GAMEOVER'
-
-    def draw(self):
-        screen.fill((135, 206, 235))
+    def counts(self):
+        """Live entities by kind"""
+        return {'enemies': len(self.enemies), 'projectiles': len(self.projectiles),
+                'sprites': len(self.camera_group), 'platforms': len(self.platforms),
+                'chunks': len(self.level.resident)}
+
+    def fire(self):
+        offset = (self.player.rect.width // 2 + 5) * self.player.facing
+        self.projectiles.spawn(self.player.rect.centerx + offset,
+                               self.player.rect.centery,
+                               self.player.facing)
+
+    def step(self, controls=0):
+        """One fixed simulation step with the replay.* bits in `controls`"""
+        self.camera_group.snapshot()
+        if controls & replay.FIRE and self.state == 'PLAY':
+            self.fire()
+        if controls & replay.RESTART and self.state == 'GAMEOVER':
+            self.reset()
         if self.state == 'PLAY':
+            with self.timings.span('update'):
+                self.update(controls)
+
+    def update(self, controls=0):
+        t = self.timings
+        with t.span('player'):
+            self.player.update(self.platforms, controls)
+        with t.span('projectiles'):
+            self.projectiles.update(self.level_width)
+        with t.span('enemies'):
+            self.enemies.update(self.level_width)
+        with t.span('collisions'):
+            self.collide()
+        with t.span('level'):
+            if not self.enemies.count(boss=False) and self.level_no < 3:
+                self.level_no += 1
+                self.load_level()
+                self.player.rect.topleft = (100, SCREEN_HEIGHT - 100)
             if self.level_no == 3 and self.boss_timer > 0:
-                f = pygame.font.SysFont(None, 50)
-                txt = f.render('Boss incoming!', True, (255, 0, 0))
-                rct = txt.get_rect(midtop=(SCREEN_WIDTH // 2, 10))
-                screen.blit(txt, rct)
-            self.camera_group.custom_draw(self.player)
-            hud = pygame.font.SysFont(None, 30)
-            screen.blit(hud.render(f'Score: {self.score}', True, (0, 0, 0)), (10, 10))
-            screen.blit(hud.render(f'Lives: {self.player.lives}', True, (0, 0, 0)), (10, 40))
+                self.boss_timer -= 1
+            if self.level_no == 3 and not self.enemies.count(boss=True):
+                self.state = 'GAMEOVER'
+        with t.span('stream'):
+            self.camera_group.follow(self.player)
+            self.level.update(self.camera_group.offset.x, self.player.rect.centerx)
+
+    def collide(self):
+        t = self.timings
+        with t.span('hits'):
+            for is_boss in resolve_hits(self.projectiles, self.enemies):
+                self.score += 200 if is_boss else 50
+        with t.span('touch'):
+            if self.enemies.touching(self.player.rect) is not None:
+                self.player.health -= 1
+                if self.player.health <= 0:
+                    self.player.lives -= 1
+                    self.player.health = self.player.max_health
+                    if self.player.lives <= 0:
+                        self.state = 'GAMEOVER'
+        with t.span('pickups'):
+            for c in self.collectibles.collide(self.player):
+                self.level.take(c)
+                c.apply(self.player)
+                self.score += 25
+
+class Game(World):
+    """World in a window: real-time loop, drawing and the HUD"""
+    def __init__(self, fps=FPS, vsync=False, level_dir=None, prefetch=True, headless=False, timings=None):
+        if headless:
+            # No window and no sound device; everything else runs as usual
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
+        pygame.init()
+        # Vsync needs a renderer-backed window in pygame 2
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT),
+                                              pygame.SCALED if vsync else 0, vsync=int(vsync))
+        self.fps = fps
+        pygame.display.set_caption('Forest Guardian')
+        self.clock = pygame.time.Clock()
+        self.hud = HUD()
+        # After set_mode, so shared surfaces get the display's pixel format
+        super().__init__(level_dir, prefetch, timings)
+        self.profiler = Profiler(self.timings, self.hud.text)
+        self.trace_path = TRACE_PATH
+
+    def on_key(self, key):
+        """Keys that are not game input"""
+        if key == PROFILER_KEY:
+            self.profiler.toggle()
+        elif key == TRACE_KEY:
+            n = self.timings.dump(self.trace_path)
+            print(f'Wrote the last {n} spans to {self.trace_path}')
+            if self.timings.dropped:
+                print(f'{self.timings.dropped} older spans were dropped; --trace FILE records a whole session')
+
+    def run(self, controls=None):
+        """Play in real time until the window closes (or a replay ends)"""
+        controls = controls or replay.KeyboardInput(self.on_key)
+        lag = 0.0
+        last = time.perf_counter()
+        while controls.poll():
+            now = time.perf_counter()
+            lag += now - last
+            last = now
+            # Busy time: steps, drawing and flip, without the wait in clock.tick
+            with self.timings.span('busy'):
+                steps = 0
+                while lag >= STEP:
+                    if steps == MAX_STEPS_PER_FRAME:
+                        lag = 0.0
+                        break
+                    bits = controls.next()
+                    if bits is None: return
+                    self.step(bits)
+                    lag -= STEP
+                    steps += 1
+                self.draw(lag / STEP)
+            self.profiler.frame()
+            self.clock.tick(self.fps)
+
+    def play(self, controls, on_frame=None):
+        """Run a replay as fast as possible, one step and one draw per frame;
+        returns the number of frames"""
+        frames = 0
+        while controls.poll():
+            bits = controls.next()
+            if bits is None: break
+            self.step(bits)
+            self.draw()
+            frames += 1
+            if on_frame: on_frame()
+        return frames
+
+    def draw(self, alpha=1.0):
+        t = self.timings
+        with t.span('draw'):
+            self.screen.fill((135, 206, 235))
+            if self.state == 'PLAY':
+                with t.span('world'):
+                    self.camera_group.custom_draw(self.screen, self.player, alpha)
+                with t.span('hud'):
+                    self.hud.draw(self.screen, self.score, self.player.lives,
+                                  self.level_no == 3 and self.boss_timer > 0)
+            else:
+                self.hud.draw_centered(self.screen, 'Game Over! Press R to Restart', 60, (255, 0, 0))
+            if self.profiler.visible:
+                with t.span('profiler'):
+                    self.profiler.draw(self.screen, self.counts(), self.clock.get_fps())
+        with t.span('flip'):
+            pygame.display.flip()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Forest Guardian')
+    ap.add_argument('--record', metavar='FILE', help='save the keys pressed as a replay')
+    ap.add_argument('--replay', metavar='FILE', help='play a recorded replay instead of the keyboard')
+    ap.add_argument('--headless', action='store_true', help='no window; play the replay as fast as possible')
+    ap.add_argument('--levels', metavar='DIR', help='directory with level1..3.fgl')
+    ap.add_argument('--fps', type=int, default=FPS, help='frame cap, 0 for none')
+    ap.add_argument('--vsync', action='store_true')
+    ap.add_argument('--profile', action='store_true', help='start with the profiler overlay (F3) shown')
+    ap.add_argument('--trace', metavar='FILE', help='stream every span of the session to a Chrome trace')
+    args = ap.parse_args(argv)
+    if args.headless and not args.replay:
+        ap.error('--headless needs --replay')
+
+    game = Game(args.fps, args.vsync, args.levels, headless=args.headless)
+    if args.profile:
+        game.profiler.toggle()
+    if args.trace:
+        game.timings.enabled = True
+        game.timings.stream(args.trace)
+    controls = replay.Replay.load(args.replay, SIM_RATE) if args.replay else replay.KeyboardInput(game.on_key)
+    if args.record:
+        controls = replay.Recorder(controls)
+    try:
+        if args.headless:
+            frames = game.play(controls)
+            print(f'{frames} steps, score {game.score}, lives {game.player.lives}, state {game.state}')
         else:
-            f = pygame.font.SysFont(None, 60)
-            txt = f.render('Game Over! Press R to Restart', True, (255, 0, 0))
-            rct = txt.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-            screen.blit(txt, rct)
-        pygame.display.flip()
+            game.run(controls)
+    finally:
+        if args.record:
+            controls.save(args.record, SIM_RATE)
+        if args.trace:
+            print(f'Wrote {game.timings.close()} spans to {args.trace}')
+        game.close()
+        pygame.quit()
+    return 0
 
 if __name__ == '__main__':
-    Game().run()
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+import replay
+from timing import Timings
+
+# -------------------------
+# Frame-time benchmark for the game, no window needed
+# -------------------------
+# Every scenario is a replay played headless and uncapped, one simulation
+# step and one draw per frame, so two runs do the same work to the pixel.
+# A game is judged by its slow frames more than by its average, so besides
+# the mean per loop phase it reports the tail percentiles and how many
+# frames overran the 60 Hz budget. Against a saved baseline a scenario
+# regresses when its p99 grows or more frames run late; one whose replay
+# now ends differently is reported as changed instead, since its timings
+# no longer measure the same play.
+
+STEPS = 1800   # 30 seconds of play at 60 steps/s
+BUDGET_MS = 1000 / 60
+
+SCENARIOS = {
+    'idle': lambda: replay.scripted(STEPS),
+    'walk_right': lambda: replay.scripted(STEPS, hold=replay.RIGHT, jump_every=45),
+    'run_and_gun': lambda: replay.scripted(STEPS, hold=replay.RIGHT, fire_every=8, jump_every=90),
+    'back_and_forth': lambda: replay.Replay(np.resize(np.repeat(np.uint8([replay.RIGHT, replay.LEFT]), 240)
+                                                      | np.where(np.arange(480) % 12 == 0, replay.FIRE, 0).astype(np.uint8),
+                                                      STEPS).tobytes()),
+}
+
+def measure(controls, level_dir=None):
+    """Play one replay; returns per-phase mean ms, frame percentiles and the final state"""
+    import Q_2_Answer as game_mod
+    timings = Timings(enabled=True)
+    game = game_mod.Game(fps=0, level_dir=level_dir, headless=True, timings=timings)
+    frames, phases = [], {}
+    last = [time.perf_counter()]
+    def on_frame():
+        now = time.perf_counter()
+        frames.append(now - last[0])
+        last[0] = now
+        for k, v in timings.take().items():
+            phases[k] = phases.get(k, 0.0) + v
+    n = game.play(controls, on_frame)
+    state = [game.score, game.player.lives, game.level_no, game.state]
+    game.level.close()
+    ms = np.array(frames) * 1000
+    r = {f'{k}_ms': v * 1000 / n for k, v in sorted(phases.items())}
+    r.update(frames=n, mean_ms=float(ms.mean()), p50_ms=float(np.percentile(ms, 50)),
+             p90_ms=float(np.percentile(ms, 90)), p99_ms=float(np.percentile(ms, 99)),
+             max_ms=float(ms.max()), fps=n / (ms.sum() / 1000),
+             late=int(np.count_nonzero(ms > BUDGET_MS)), state=state)
+    return r, state
+
+def run(scenarios, level_dir=None, log=print):
+    results = {}
+    log(f'{"scenario":<18}{"fps":>8}{"p50":>8}{"p90":>8}{"p99":>8}{"max":>8}{"late":>6}  phases (mean ms)')
+    for name, controls in scenarios.items():
+        r, state = measure(controls, level_dir)
+        results[name] = r
+        phases = ' '.join(f'{k[:-3]}={v:.2f}' for k, v in r.items() if k.endswith('_ms')
+                          and k[:-3] in ('update', 'collisions', 'draw', 'flip'))
+        log(f'{name:<18}{r["fps"]:>8.0f}{r["p50_ms"]:>8.2f}{r["p90_ms"]:>8.2f}'
+            f'{r["p99_ms"]:>8.2f}{r["max_ms"]:>8.2f}{r["late"]:>6}  {phases}  -> {state}')
+    return results
+
+def compare(results, baseline, tolerance, log=print):
+    """Log scenarios whose p99 grew by more than `tolerance` or that ran late more
+    often, and ones that no longer play the same; returns the names of both"""
+    bad = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b: continue
+        if b.get('state', r['state']) != r['state']:
+            bad.append(name)
+            log(f'CHANGED {name}: replay now ends at {r["state"]}, baseline {b["state"]}')
+            continue
+        ratio = r['p99_ms'] / b['p99_ms']
+        late = r['late'] - b.get('late', r['late'])
+        if ratio > tolerance or r['late'] > max(1, b.get('late', 0)) * tolerance:
+            bad.append(name)
+            log(f'REGRESSION {name}: p99 {b["p99_ms"]:.2f} -> {r["p99_ms"]:.2f} ms ({ratio:.2f}x), '
+                f'{late:+d} frames over {BUDGET_MS:.1f} ms')
+    log(f'{len(bad)} of {len(results)} scenarios regressed or changed' if bad else 'No regressions')
+    return bad
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Benchmark the game loop on replays, no window needed')
+    ap.add_argument('--scenarios', default=','.join(SCENARIOS))
+    ap.add_argument('--replay', action='append', default=[], metavar='FILE', help='also run a recorded replay')
+    ap.add_argument('--levels', metavar='DIR', help='directory with level1..3.fgl')
+    ap.add_argument('--write-replays', metavar='DIR', help='save the built-in scenarios as replay files')
+    ap.add_argument('--save', help='write results as a baseline JSON')
+    ap.add_argument('--baseline', help='compare against a baseline JSON')
+    ap.add_argument('--tolerance', type=float, default=1.25, help='slowdown ratio counted as a regression')
+    args = ap.parse_args(argv)
+
+    from Q_2_Answer import SIM_RATE
+    scenarios = {n: SCENARIOS[n]() for n in args.scenarios.split(',') if n in SCENARIOS}
+    if args.write_replays:
+        os.makedirs(args.write_replays, exist_ok=True)
+        for name, r in scenarios.items():
+            replay.save(os.path.join(args.write_replays, f'{name}.fgr'), r.steps, SIM_RATE)
+    for path in args.replay:
+        scenarios[os.path.basename(path)] = replay.Replay.load(path, SIM_RATE)
+
+    results = run(scenarios, args.levels)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=1)
+    if args.baseline:
+        with open(args.baseline) as f:
+            return 1 if compare(results, json.load(f), args.tolerance) else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
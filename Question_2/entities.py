@@ -0,0 +1,212 @@
+import numpy as np
+
+from render import shared_surface
+
+# -------------------------
+# Enemies and projectiles as columns of NumPy arrays
+# -------------------------
+# One row per entity, in spawn order (dead rows are dropped without
+# reordering), so a tick moves, wraps, culls and resolves hits for the whole
+# population in a few array operations. Drawing reads the same arrays; all
+# entities of a kind share one surface.
+
+def overlaps(ax, ay, aw, ah, bx, by, bw, bh):
+    """pygame.Rect.colliderect, broadcast over arrays"""
+    return (ax < bx + bw) & (bx < ax + aw) & (ay < by + bh) & (by < ay + ah)
+
+class EntityStore:
+    """Growable parallel arrays; subclasses name their extra columns in FIELDS"""
+    FIELDS = {}
+    BASE = {'x': np.int32, 'y': np.int32, 'w': np.int32, 'h': np.int32,
+            'px': np.int32, 'py': np.int32, 'vx': np.int32, 'kind': np.int8}
+
+    def __init__(self, capacity=64):
+        self.n = 0
+        # Dead rows are reused by later spawns; arrays only grow past the peak
+        self.spawned = self.freed = self.peak = self.grows = 0
+        self.columns = {**self.BASE, **self.FIELDS}
+        for name, dtype in self.columns.items():
+            setattr(self, name, np.zeros(capacity, dtype))
+        self.images = []
+
+    def __len__(self):
+        return self.n
+
+    def _spawn(self, **values):
+        if self.n == len(self.x):
+            for name in self.columns:
+                a = getattr(self, name)
+                setattr(self, name, np.concatenate([a, np.zeros_like(a)]))
+            self.grows += 1
+        i = self.n
+        for name, v in values.items():
+            getattr(self, name)[i] = v
+        self.px[i], self.py[i] = self.x[i], self.y[i]
+        self.n += 1
+        self.spawned += 1
+        self.peak = max(self.peak, self.n)
+        return i
+
+    def remove(self, dead):
+        """Drop rows where `dead` is set, keeping the order of the rest"""
+        if not dead.any(): return
+        keep = np.flatnonzero(~dead)
+        for name in self.columns:
+            a = getattr(self, name)
+            a[:len(keep)] = a[keep]
+        self.freed += self.n - len(keep)
+        self.n = len(keep)
+
+    def clear(self):
+        self.freed += self.n
+        self.n = 0
+
+    def stats(self):
+        return {'in_use': self.n, 'capacity': len(self.x), 'peak': self.peak,
+                'spawned': self.spawned, 'freed': self.freed, 'grows': self.grows}
+
+    def snapshot(self):
+        n = self.n
+        self.px[:n] = self.x[:n]
+        self.py[:n] = self.y[:n]
+
+    def touching(self, rect):
+        """Index of the first entity overlapping rect, or None. One array test over
+        every row: for a single rect that beats sorting the rows for a sweep"""
+        n = self.n
+        hit = np.flatnonzero(overlaps(self.x[:n], self.y[:n], self.w[:n], self.h[:n],
+                                      rect.x, rect.y, rect.w, rect.h))
+        return int(hit[0]) if hit.size else None
+
+    def bars(self, idx):
+        return None
+
+    def visible(self, view, ox, oy, alpha, snap):
+        """(centery, image, (x, y), health bar args) of the rows inside `view`, sorted by centery"""
+        n = self.n
+        x, y, w, h = self.x[:n], self.y[:n], self.w[:n], self.h[:n]
+        idx = np.flatnonzero(overlaps(x, y, w, h, view.x, view.y, view.w, view.h))
+        if not idx.size: return []
+        cy = y[idx] + h[idx] // 2
+        order = np.argsort(cy, kind='stable')
+        idx, cy = idx[order], cy[order]
+        px, py = self.px[idx], self.py[idx]
+        dx, dy = x[idx] - px, y[idx] - py
+        moved = (np.abs(dx) <= snap) & (np.abs(dy) <= snap)
+        # Round half to even, like round() on the sprites
+        sx = np.where(moved, px + np.round(dx * alpha).astype(np.int32), x[idx]) - ox
+        sy = np.where(moved, py + np.round(dy * alpha).astype(np.int32), y[idx]) - oy
+        images = self.images
+        kinds = self.kind[idx]
+        bars = self.bars(idx)
+        return [(c, images[k], (a, b), bar)
+                for c, k, a, b, bar in zip(cy.tolist(), kinds.tolist(), sx.tolist(), sy.tolist(),
+                                           bars or [None] * len(idx))]
+
+class Enemies(EntityStore):
+    FIELDS = {'health': np.int32, 'max_health': np.int32, 'boss': np.bool_}
+    SIZE = ((30, 50), (60, 80))             # minion, boss
+    COLOR = ((100, 100, 100), (50, 50, 50))
+    HEALTH = (50, 150)
+    SPEED = 2
+
+    def __init__(self, capacity=64):
+        super().__init__(capacity)
+        self.images = [shared_surface(s, c) for s, c in zip(self.SIZE, self.COLOR)]
+
+    def spawn(self, x, y, is_boss=False, direction=-1):
+        k = int(is_boss)
+        w, h = self.SIZE[k]
+        return self._spawn(x=x, y=y, w=w, h=h, vx=self.SPEED * direction, kind=k,
+                           health=self.HEALTH[k], max_health=self.HEALTH[k], boss=is_boss)
+
+    def update(self, width):
+        """Walk, wrapping around the level"""
+        n = self.n
+        x, w = self.x[:n], self.w[:n]
+        x += self.vx[:n]
+        gone_left = x + w < 0
+        gone_right = ~gone_left & (x > width)
+        x[gone_left] = width
+        x[gone_right] = -w[gone_right]
+
+    def count(self, boss):
+        return int(np.count_nonzero(self.boss[:self.n] == boss))
+
+    def bars(self, idx):
+        return list(zip(self.health[idx].tolist(), self.max_health[idx].tolist()))
+
+class Projectiles(EntityStore):
+    FIELDS = {'damage': np.int32}
+    SIZE = (10, 5)
+    COLOR = (255, 165, 0)
+    SPEED = 12
+    DAMAGE = 25
+
+    def __init__(self, capacity=64):
+        super().__init__(capacity)
+        self.images = [shared_surface(self.SIZE, self.COLOR)]
+
+    def spawn(self, x, y, direction):
+        w, h = self.SIZE
+        return self._spawn(x=x, y=y, w=w, h=h, vx=self.SPEED * direction, damage=self.DAMAGE)
+
+    def update(self, width):
+        """Fly; anything that leaves the level is dropped"""
+        n = self.n
+        x = self.x[:n]
+        x += self.vx[:n]
+        self.remove((x + self.w[:n] < 0) | (x > width))
+
+def overlapping_pairs(a, b):
+    """(i, j) index arrays of the overlapping rows of stores a and b, sorted by
+    i then j. Sort and sweep on x: only pairs that overlap in x get tested."""
+    A, B = a.n, b.n
+    none = np.zeros(0, np.intp)
+    if not A or not B: return none, none
+    order = np.argsort(b.x[:B], kind='stable')
+    bx, by = b.x[:B][order], b.y[:B][order]
+    b_right, b_bottom = bx + b.w[:B][order], by + b.h[:B][order]
+    ax, ay = a.x[:A], a.y[:A]
+    # b.x < a.x + a.w from the search; b.x > a.x - widest b narrows the rest
+    lo = np.searchsorted(bx, ax - int(b.w[:B].max()), 'right')
+    hi = np.searchsorted(bx, ax + a.w[:A], 'left')
+    counts = np.maximum(hi - lo, 0)
+    total = int(counts.sum())
+    if not total: return none, none
+    # Candidate k of b (in x order) for each repeated row of a
+    k = np.repeat(lo - (np.cumsum(counts) - counts), counts) + np.arange(total)
+    hit = ((np.repeat(ax, counts) < b_right[k]) & (np.repeat(ay, counts) < b_bottom[k])
+           & (by[k] < np.repeat(ay + a.h[:A], counts)))
+    i = np.repeat(np.arange(A), counts)[hit]
+    j = order[k[hit]]
+    o = np.lexsort((j, i))
+    return i[o], j[o]
+
+def resolve_hits(projectiles, enemies):
+    """Projectiles hit the first enemy they overlap, in spawn order, as the
+    sprite version did one at a time. Spent projectiles and dead enemies are
+    removed; returns the boss flags of the enemies killed."""
+    pi, ej = overlapping_pairs(projectiles, enemies)
+    if not pi.size: return []
+    alive = np.ones(enemies.n, bool)
+    spent = np.zeros(projectiles.n, bool)
+    health, damage, boss = enemies.health, projectiles.damage, enemies.boss
+    killed = []
+    # Only projectiles touching something get here; an enemy killed by an
+    # earlier one can't be hit again, later ones go on to the next in line
+    starts = np.flatnonzero(np.r_[True, pi[1:] != pi[:-1]]).tolist()
+    ej = ej.tolist()
+    for a, b in zip(starts, starts[1:] + [len(ej)]):
+        for j in ej[a:b]:
+            if alive[j]:
+                i = pi[a]
+                health[j] -= damage[i]
+                spent[i] = True
+                if health[j] <= 0:
+                    alive[j] = False
+                    killed.append(bool(boss[j]))
+                break
+    projectiles.remove(spent)
+    enemies.remove(~alive)
+    return killed
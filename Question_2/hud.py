@@ -0,0 +1,67 @@
+import pygame
+
+# -------------------------
+# Text and HUD drawing without per-frame font work
+# -------------------------
+# Fonts are looked up once, rendered strings are kept by (text, size,
+# colour), and the HUD is composited into one overlay surface that is only
+# rebuilt when what it shows changes. A frame then costs a single blit.
+
+TEXT_KEEP = 256
+
+class Text:
+    def __init__(self, keep=TEXT_KEEP):
+        self.fonts = {}
+        self.cache = {}
+        self.keep = keep
+
+    def font(self, size):
+        f = self.fonts.get(size)
+        if f is None:
+            f = self.fonts[size] = pygame.font.SysFont(None, size)
+        return f
+
+    def render(self, text, size, color):
+        key = (text, size, color)
+        surf = self.cache.get(key)
+        if surf is None:
+            if len(self.cache) >= self.keep:
+                # Old scores pile up otherwise; all of it is cheap to redo
+                self.cache.clear()
+            surf = self.cache[key] = self.font(size).render(text, True, color).convert_alpha()
+        return surf
+
+class HUD:
+    def __init__(self, text=None):
+        self.text = text or Text()
+        self.state = None
+        self.overlay = None
+        self.pos = (0, 0)
+
+    def _compose(self, items):
+        """One surface holding every (surface, rect) in items, and where it goes"""
+        if not items:
+            return None, (0, 0)
+        area = items[0][1].unionall([r for _, r in items[1:]])
+        overlay = pygame.Surface(area.size, pygame.SRCALPHA)
+        overlay.blits([(s, r.move(-area.x, -area.y)) for s, r in items], doreturn=False)
+        return overlay, area.topleft
+
+    def draw(self, surface, score, lives, boss_alert=False):
+        state = (score, lives, boss_alert)
+        if state != self.state:
+            items = []
+            if boss_alert:
+                txt = self.text.render('Boss incoming!', 50, (255, 0, 0))
+                items.append((txt, txt.get_rect(midtop=(surface.get_width() // 2, 10))))
+            txt = self.text.render(f'Score: {score}', 30, (0, 0, 0))
+            items.append((txt, txt.get_rect(topleft=(10, 10))))
+            txt = self.text.render(f'Lives: {lives}', 30, (0, 0, 0))
+            items.append((txt, txt.get_rect(topleft=(10, 40))))
+            self.overlay, self.pos = self._compose(items)
+            self.state = state
+        surface.blit(self.overlay, self.pos)
+
+    def draw_centered(self, surface, message, size, color):
+        txt = self.text.render(message, size, color)
+        surface.blit(txt, txt.get_rect(center=surface.get_rect().center))
@@ -0,0 +1,121 @@
+import argparse
+import io
+import os
+import struct
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# -------------------------
+# Level files, read a chunk at a time
+# -------------------------
+# Layout (little endian):
+#   header   magic 'FGL1', level width, chunk width, number of chunks, actors
+#   index    per chunk: file offset, record count
+#   actors   enemies, in spawn order
+#   records  the static world (ground, pickups), chunk after chunk
+# Every record is kind, direction, w, h, x, y. Enemies roam and wrap around
+# the whole level, so they are read at once into the entity store; the world
+# is read a chunk at a time as the camera gets near. Opening a level reads
+# neither the world nor anything proportional to its width beyond the index.
+
+MAGIC = b'FGL1'
+HEADER = struct.Struct('<4sIIII')
+INDEX = np.dtype([('offset', '<u8'), ('count', '<u4')])
+RECORD = np.dtype([('kind', 'u1'), ('dir', 'i1'), ('w', '<u2'), ('h', '<u2'), ('x', '<i4'), ('y', '<i4')])
+
+PLATFORM, ENEMY, BOSS, COLLECTIBLE = range(4)
+CHUNK = 512
+PREFETCH_KEEP = 4
+WOLVES_PER_LEVEL = 3   # built-in level n has n times as many
+
+def encode(width, records, chunk=CHUNK):
+    """Level file bytes for `records` (a RECORD array); world things outside
+    the level go to the first or last chunk"""
+    n = max(1, -(-width // chunk))
+    records = np.asarray(records, RECORD)
+    is_actor = (records['kind'] == ENEMY) | (records['kind'] == BOSS)
+    actors, world = records[is_actor], records[~is_actor]
+    owner = np.clip(world['x'] // chunk, 0, n - 1)
+    order = np.argsort(owner, kind='stable')
+    world, owner = world[order], owner[order]
+    index = np.zeros(n, INDEX)
+    index['count'] = np.bincount(owner, minlength=n)
+    start = HEADER.size + index.nbytes + actors.nbytes
+    index['offset'] = start + (np.cumsum(index['count']) - index['count']) * RECORD.itemsize
+    return (HEADER.pack(MAGIC, width, chunk, n, len(actors)) + index.tobytes()
+            + actors.tobytes() + world.tobytes())
+
+def save(path, width, records, chunk=CHUNK):
+    with open(path, 'wb') as f:
+        f.write(encode(width, records, chunk))
+
+def builtin(num, width, height):
+    """The stock layout of level `num`: ground, a wave of wolves or the boss, two health packs"""
+    recs = [(PLATFORM, 0, 200, 40, x, height - 40) for x in range(0, width, 200)]
+    if num < 3:
+        recs += [(ENEMY, -1, 30, 50, 400 + i * 200, height - 100) for i in range(WOLVES_PER_LEVEL * num)]
+    else:
+        recs.append((BOSS, -1, 60, 80, width + 100, height - 140))
+    recs += [(COLLECTIBLE, 0, 20, 20, 300 + i * 600, height - 120) for i in range(2)]
+    return np.array(recs, RECORD)
+
+class LevelFile:
+    """A level file or bytes: `actors` at once, read(i) for the RECORD array of chunk i"""
+    def __init__(self, source, prefetch=True):
+        self.f = io.BytesIO(source) if isinstance(source, bytes) else open(source, 'rb')
+        magic, self.width, self.chunk, self.n, actors = HEADER.unpack(self.f.read(HEADER.size))
+        if magic != MAGIC:
+            self.f.close()
+            raise ValueError('not a Forest Guardian level')
+        self.index = np.frombuffer(self.f.read(self.n * INDEX.itemsize), INDEX)
+        self.actors = np.frombuffer(self.f.read(actors * RECORD.itemsize), RECORD)
+        self.lock = threading.Lock()
+        self.loader = ThreadPoolExecutor(1) if prefetch else None
+        self.pending = {}
+
+    def _read(self, i):
+        off, count = int(self.index['offset'][i]), int(self.index['count'][i])
+        with self.lock:
+            self.f.seek(off)
+            return np.frombuffer(self.f.read(count * RECORD.itemsize), RECORD)
+
+    def read(self, i):
+        fut = self.pending.pop(i, None)
+        return fut.result() if fut is not None else self._read(i)
+
+    def prefetch(self, i):
+        """Start reading chunk i in the background, if there is such a chunk"""
+        if self.loader is None or not 0 <= i < self.n or i in self.pending: return
+        if len(self.pending) >= PREFETCH_KEEP:
+            # Oldest guess first out; reading it again later is only a seek
+            self.pending.pop(next(iter(self.pending))).cancel()
+        self.pending[i] = self.loader.submit(self._read, i)
+
+    def close(self):
+        if self.loader is not None:
+            # Reads not started yet are dropped; shutdown(cancel_futures=) needs 3.9
+            for fut in self.pending.values():
+                fut.cancel()
+            self.pending.clear()
+            self.loader.shutdown(wait=True)
+        self.f.close()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Write the Forest Guardian levels as level files')
+    ap.add_argument('dst', help='directory for level1.fgl ... level3.fgl')
+    ap.add_argument('--width', type=int, default=2000, help='level width in pixels')
+    ap.add_argument('--height', type=int, default=600, help='screen height the layout is made for')
+    ap.add_argument('--chunk', type=int, default=CHUNK)
+    args = ap.parse_args(argv)
+    os.makedirs(args.dst, exist_ok=True)
+    for num in (1, 2, 3):
+        path = os.path.join(args.dst, f'level{num}.fgl')
+        save(path, args.width, builtin(num, args.width, args.height), args.chunk)
+        print(f'{path}: {os.path.getsize(path)} bytes')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,38 @@
+# -------------------------
+# Reusable sprites
+# -------------------------
+# Sprites made through a Pool go back to it when killed (or when reclaim()
+# finds them in no group after a reset), and the next acquire() moves one
+# of those into place instead of building a new one. Counters show how
+# well it is working.
+
+class Pool:
+    def __init__(self, factory):
+        self.factory = factory
+        self.items = []
+        self.free = []
+        self.created = self.reused = self.peak = 0
+
+    def acquire(self, *args, **kwargs):
+        if self.free:
+            sprite = self.free.pop()
+            sprite.place(*args, **kwargs)
+            self.reused += 1
+        else:
+            sprite = self.factory(*args, **kwargs)
+            sprite.pool = self
+            self.items.append(sprite)
+            self.created += 1
+        self.peak = max(self.peak, len(self.items) - len(self.free))
+        return sprite
+
+    def release(self, sprite):
+        self.free.append(sprite)
+
+    def reclaim(self):
+        """Take back every sprite that is in no group (after Group.empty())"""
+        self.free = [s for s in self.items if not s.alive()]
+
+    def stats(self):
+        return {'in_use': len(self.items) - len(self.free), 'free': len(self.free),
+                'peak': self.peak, 'created': self.created, 'reused': self.reused}
@@ -0,0 +1,87 @@
+from collections import deque
+
+import numpy as np
+import pygame
+
+from hud import Text
+
+# -------------------------
+# Frame profiler overlay
+# -------------------------
+# Toggled in game (F3): turns the Timings spans on and shows, in a corner
+# panel, a graph of the busy time of the last frames against the 60 fps
+# budget, a smoothed breakdown per phase and the entity counts. The text is
+# only re-rendered a few times a second; the graph is redrawn every frame.
+# While hidden it does nothing but keep the `visible` flag.
+
+FRAMES = 240             # one graph column per frame
+GRAPH_H = 60
+GRAPH_MS = 1000 / 30     # top of the graph
+BUDGET_MS = 1000 / 60
+REFRESH = 250            # ms between text updates
+SMOOTHING = 0.1
+PHASES_SHOWN = 10
+FONT = 18
+
+class Profiler:
+    def __init__(self, timings, text=None):
+        self.timings = timings
+        self.text = text or Text()
+        self.visible = False
+        self.was_enabled = timings.enabled
+        self.frames = deque(maxlen=FRAMES)
+        self.phases = {}
+        self.lines = []
+        self.refreshed = 0
+
+    def toggle(self):
+        """Show or hide the overlay; spans are measured while it shows"""
+        self.visible = not self.visible
+        if self.visible:
+            self.was_enabled = self.timings.enabled
+        self.timings.enabled = self.visible or self.was_enabled
+        self.frames.clear()
+        self.phases.clear()
+        self.timings.take()
+        return self.visible
+
+    def frame(self):
+        """Collect the spans of the frame just finished"""
+        if not self.visible: return
+        t = self.timings.take()
+        self.frames.append(t.get('busy', 0.0) * 1000)
+        for name in self.phases.keys() | t.keys():
+            ms = t.get(name, 0.0) * 1000
+            self.phases[name] = self.phases.get(name, ms) * (1 - SMOOTHING) + ms * SMOOTHING
+
+    def draw(self, surface, counts, fps):
+        now = pygame.time.get_ticks()
+        if now - self.refreshed >= REFRESH or not self.lines:
+            self.refreshed = now
+            self.lines = [self.text.render(line, FONT, (255, 255, 255)) for line in self._describe(counts, fps)]
+        width = max([FRAMES] + [l.get_width() for l in self.lines]) + 10
+        height = GRAPH_H + 10 + sum(l.get_height() for l in self.lines)
+        x0 = surface.get_width() - width - 10
+        panel = pygame.Rect(x0, 10, width, height)
+        surface.fill((0, 0, 0), panel)
+        gx, gy = x0 + 5, 15
+        budget = gy + GRAPH_H - round(BUDGET_MS / GRAPH_MS * GRAPH_H)
+        pygame.draw.line(surface, (255, 200, 0), (gx, budget), (gx + FRAMES - 1, budget))
+        if len(self.frames) > 1:
+            ms = np.minimum(np.fromiter(self.frames, float), GRAPH_MS)
+            ys = gy + GRAPH_H - np.round(ms / GRAPH_MS * GRAPH_H).astype(int)
+            pygame.draw.lines(surface, (0, 255, 0), False, list(zip(range(gx, gx + len(ys)), ys.tolist())))
+        y = gy + GRAPH_H + 5
+        batch = []
+        for line in self.lines:
+            batch.append((line, (gx, y)))
+            y += line.get_height()
+        surface.blits(batch, doreturn=False)
+
+    def _describe(self, counts, fps):
+        ms = np.fromiter(self.frames, float) if self.frames else np.zeros(1)
+        lines = [f'{fps:.0f} fps  busy {ms.mean():.2f} ms  p99 {np.percentile(ms, 99):.2f}  max {ms.max():.2f}']
+        top = sorted(((v, k) for k, v in self.phases.items() if k != 'busy'), reverse=True)
+        lines += [f'{k:<12}{v:7.3f} ms' for v, k in top[:PHASES_SHOWN]]
+        lines.append('  '.join(f'{k} {v}' for k, v in counts.items()))
+        return lines
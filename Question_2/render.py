@@ -0,0 +1,104 @@
+import pygame
+
+# -------------------------
+# Cached drawing for the parts of the world that never move
+# -------------------------
+# Static sprites (the ground) are painted once into surfaces CHUNK pixels
+# wide, made lazily the first time they come into view. A frame then costs
+# one blit per visible chunk however many platforms the level has. Adding or
+# removing sprites only drops the chunks they overlap.
+
+CHUNK = 512
+KEY = (255, 0, 255)   # transparent colour of the chunk surfaces
+
+def display_format(surface, alpha=False):
+    """Surface converted to the screen's pixel format, once there is a screen"""
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert_alpha() if alpha else surface.convert()
+
+_shared = {}
+
+def shared_surface(size, color):
+    """One filled surface per size and colour, for every sprite that looks the same"""
+    key = (tuple(size), tuple(color))
+    surf = _shared.get(key)
+    if surf is None:
+        surf = _shared[key] = display_format(pygame.Surface(size))
+        surf.fill(color)
+    return surf
+
+class StaticLayer:
+    def __init__(self, chunk=CHUNK):
+        self.chunk = chunk
+        self.sprites = {}   # insertion ordered, for the paint order
+        self.chunks = {}
+        self.left = self.right = self.top = self.bottom = 0
+
+    def add(self, *sprites):
+        if not sprites: return
+        fresh = not self.sprites
+        self.sprites.update(dict.fromkeys(sprites))
+        left, right, top, bottom = _bounds(sprites)
+        if fresh:
+            self.left, self.right, self.chunks = left, right, {}
+            self.top, self.bottom = top, bottom
+            return
+        self.left, self.right = min(self.left, left), max(self.right, right)
+        self._invalidate(min(self.top, top), max(self.bottom, bottom), sprites)
+
+    def remove(self, *sprites):
+        gone = [s for s in sprites if s in self.sprites]
+        if not gone: return
+        for s in gone:
+            del self.sprites[s]
+        if not self.sprites:
+            self.chunks.clear()
+            return
+        top, bottom = self.top, self.bottom
+        if any(s.rect.left <= self.left or s.rect.right >= self.right or
+               s.rect.top <= top or s.rect.bottom >= bottom for s in gone):
+            # Only a sprite on the edge can shrink the bounds
+            self.left, self.right, top, bottom = _bounds(self.sprites)
+        self._invalidate(top, bottom, gone)
+
+    def clear(self):
+        self.sprites.clear()
+        self.chunks.clear()
+
+    def _invalidate(self, top, bottom, sprites):
+        """Drop the chunks under `sprites`, or every chunk if the layer's height changed"""
+        if (top, bottom) != (self.top, self.bottom):
+            self.top, self.bottom = top, bottom
+            self.chunks.clear()
+            return
+        for s in sprites:
+            for i in range(s.rect.left // self.chunk, (s.rect.right - 1) // self.chunk + 1):
+                self.chunks.pop(i, None)
+
+    def _build(self, i):
+        area = pygame.Rect(i * self.chunk, self.top, self.chunk, self.bottom - self.top)
+        surf = display_format(pygame.Surface(area.size))
+        surf.fill(KEY)
+        surf.set_colorkey(KEY, pygame.RLEACCEL)
+        for s in self.sprites:
+            if area.colliderect(s.rect):
+                surf.blit(s.image, (s.rect.x - area.x, s.rect.y - area.y))
+        return surf
+
+    def visible(self, view, ox, oy):
+        """(surface, position) pairs for the chunks under `view`, for Surface.blits"""
+        if not self.sprites or view.bottom <= self.top or view.top >= self.bottom:
+            return []
+        out = []
+        left, right = max(view.left, self.left), min(view.right, self.right)
+        for i in range(left // self.chunk, (right - 1) // self.chunk + 1):
+            surf = self.chunks.get(i)
+            if surf is None:
+                surf = self.chunks[i] = self._build(i)
+            out.append((surf, (i * self.chunk - ox, self.top - oy)))
+        return out
+
+def _bounds(sprites):
+    return (min(s.rect.left for s in sprites), max(s.rect.right for s in sprites),
+            min(s.rect.top for s in sprites), max(s.rect.bottom for s in sprites))
@@ -0,0 +1,113 @@
+import struct
+import zlib
+
+import numpy as np
+import pygame
+
+# -------------------------
+# Player input as one byte per simulation step
+# -------------------------
+# The game only ever sees these bits, so a session recorded from the
+# keyboard plays back exactly: the simulation has no other input and no
+# randomness. Replay files are the bytes, zlib-compressed (long runs of the
+# same keys shrink to almost nothing).
+
+LEFT, RIGHT, JUMP, FIRE, RESTART = 1, 2, 4, 8, 16
+
+MAGIC = b'FGR1'
+HEADER = struct.Struct('<4sHI')   # magic, simulation rate, steps
+
+class KeyboardInput:
+    """Live keys. Each F press is one shot: presses queue up and the following
+    steps fire one each, so tapping faster than the step rate loses none. An R
+    press is latched until the next step takes it. Other key presses go to
+    on_key (keys that are not game input)."""
+    def __init__(self, on_key=None):
+        self.pressed = 0
+        self.shots = 0
+        self.on_key = on_key
+
+    def poll(self):
+        """Handle window events; False once the window is closed"""
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_f: self.shots += 1
+                elif event.key == pygame.K_r: self.pressed |= RESTART
+                elif self.on_key: self.on_key(event.key)
+        return True
+
+    def next(self):
+        keys = pygame.key.get_pressed()
+        bits = (LEFT * keys[pygame.K_LEFT] | RIGHT * keys[pygame.K_RIGHT]
+                | JUMP * keys[pygame.K_SPACE] | self.pressed)
+        self.pressed = 0
+        if self.shots:
+            bits |= FIRE
+            self.shots -= 1
+        return bits
+
+class Recorder:
+    """Passes another input through, keeping every step for save()"""
+    def __init__(self, source):
+        self.source = source
+        self.steps = bytearray()
+
+    def poll(self):
+        return self.source.poll()
+
+    def next(self):
+        bits = self.source.next()
+        if bits is not None:
+            self.steps.append(bits)
+        return bits
+
+    def save(self, path, sim_rate):
+        save(path, self.steps, sim_rate)
+
+class Replay:
+    """Steps from a recording; next() is None at the end"""
+    def __init__(self, steps):
+        self.steps = bytes(steps)
+        self.pos = 0
+
+    @classmethod
+    def load(cls, path, sim_rate):
+        with open(path, 'rb') as f:
+            magic, rate, n = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f'{path} is not a replay')
+            if rate != sim_rate:
+                raise ValueError(f'{path} was recorded at {rate} steps/s, the game runs {sim_rate}')
+            steps = zlib.decompress(f.read())
+        if len(steps) != n:
+            raise ValueError(f'{path} is truncated')
+        return cls(steps)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def poll(self):
+        """Keep the window (if any) responsive, ignoring the keyboard; False once it
+        is closed"""
+        if not pygame.display.get_init(): return True
+        # Drain the queue, or it fills up during a long replay
+        return not any(e.type == pygame.QUIT for e in pygame.event.get())
+
+    def next(self):
+        if self.pos == len(self.steps): return None
+        self.pos += 1
+        return self.steps[self.pos - 1]
+
+def save(path, steps, sim_rate):
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, sim_rate, len(steps)) + zlib.compress(bytes(steps), 9))
+
+def scripted(n, hold=0, fire_every=0, jump_every=0, restart=True):
+    """Replay of n steps: `hold` keys down, firing and jumping at fixed intervals"""
+    steps = np.full(n, hold, np.uint8)
+    if fire_every: steps[::fire_every] |= FIRE
+    if jump_every: steps[::jump_every] |= JUMP
+    if restart: steps[::60] |= RESTART   # back into play after a game over
+    return Replay(steps.tobytes())
@@ -0,0 +1,192 @@
+import argparse
+import ast
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+import entities
+import levels
+import replay
+from Q_2_Answer import SIM_RATE, Collectible, Player, World
+
+# -------------------------
+# Many games at once, no window, for balancing and AI runs
+# -------------------------
+# A Batch steps N independent worlds in lockstep, each with its own input.
+# Episodes end when the game is over (boss beaten or lives gone) or after
+# max_steps; the runner shards episodes over worker processes and sums up
+# score, lives lost and time to clear. Inputs come from a policy seeded
+# per episode, so any episode can be replayed exactly (--write-replay).
+
+# Constants that --set may change, e.g. --set Enemies.SPEED=3 or
+# --set levels.WOLVES_PER_LEVEL=5 (the built-in levels only: wolves in a
+# --levels file are fixed). Timers and the level width are not tunable.
+TUNABLE = {'Enemies': entities.Enemies, 'Projectiles': entities.Projectiles,
+           'Player': Player, 'Collectible': Collectible, 'levels': levels}
+
+def _idle(rng, n):
+    return np.zeros(n, np.uint8)
+
+def _scripted(rng, n):
+    """Run right, shooting and jumping at intervals drawn once per episode"""
+    fire, jump = int(rng.integers(4, 16)), int(rng.integers(30, 120))
+    return replay.scripted(n, replay.RIGHT, fire, jump, restart=False).steps
+
+def _random(rng, n):
+    """A new direction every half second, random shots and jumps"""
+    moves = np.array([0, replay.LEFT, replay.RIGHT, replay.RIGHT], np.uint8)
+    steps = np.repeat(rng.choice(moves, -(-n // 30)), 30)[:n]
+    steps |= np.where(rng.random(n) < 0.15, replay.FIRE, 0).astype(np.uint8)
+    steps |= np.where(rng.random(n) < 0.02, replay.JUMP, 0).astype(np.uint8)
+    return steps
+
+POLICIES = {'idle': _idle, 'scripted': _scripted, 'random': _random}
+
+def controls(policy, seed, n):
+    """Input bytes of episode `seed` under `policy`"""
+    return bytes(POLICIES[policy](np.random.default_rng(seed), n))
+
+class Batch:
+    """N worlds stepped together; done[i] once world i is over"""
+    def __init__(self, n, level_dir=None):
+        self.worlds = [World(level_dir, prefetch=False) for _ in range(n)]
+        self.steps = np.zeros(n, np.int64)
+        self.done = np.zeros(n, bool)
+
+    def step(self, bits):
+        """One step of every running world; bits[i] are world i's keys"""
+        for i in np.flatnonzero(~self.done):
+            w = self.worlds[i]
+            w.step(int(bits[i]))
+            self.steps[i] += 1
+            self.done[i] = w.state == 'GAMEOVER'
+
+    def outcomes(self):
+        return [dict(score=w.score, lives_lost=Player.LIVES - w.player.lives, level=w.level_no,
+                     cleared=w.cleared, steps=int(s))
+                for w, s in zip(self.worlds, self.steps)]
+
+    def close(self):
+        for w in self.worlds:
+            w.close()
+
+def run_episodes(seeds, policy, max_steps, level_dir=None):
+    """Play one episode per seed in a single Batch; returns their outcomes"""
+    inputs = np.frombuffer(b''.join(controls(policy, s, max_steps) for s in seeds),
+                           np.uint8).reshape(len(seeds), max_steps)
+    batch = Batch(len(seeds), level_dir)
+    try:
+        for t in range(max_steps):
+            if batch.done.all(): break
+            batch.step(inputs[:, t])
+        out = batch.outcomes()
+    finally:
+        batch.close()
+    for o, s in zip(out, seeds):
+        o['seed'] = s
+    return out
+
+def parse_settings(settings):
+    """[(owner, NAME, value)] from 'Owner.NAME=value' strings; ValueError if one
+    is malformed or names something not in TUNABLE"""
+    out = []
+    for item in settings:
+        name, eq, value = item.partition('=')
+        owner, _, attr = name.partition('.')
+        if not eq or owner not in TUNABLE or not attr.isupper() or not hasattr(TUNABLE[owner], attr):
+            raise ValueError(f'cannot tune {name}')
+        try:
+            out.append((TUNABLE[owner], attr, ast.literal_eval(value)))
+        except (ValueError, SyntaxError):
+            raise ValueError(f'{name}: {value!r} is not a Python literal') from None
+    return out
+
+@contextmanager
+def tuned(settings):
+    """Apply 'Owner.NAME=value' settings inside the block, then put the old values back"""
+    changes = parse_settings(settings)
+    old = [(owner, attr, getattr(owner, attr)) for owner, attr, _ in changes]
+    try:
+        for owner, attr, value in changes:
+            setattr(owner, attr, value)
+        yield
+    finally:
+        for owner, attr, value in reversed(old):
+            setattr(owner, attr, value)
+
+def _shard(args):
+    seeds, policy, max_steps, level_dir, settings = args
+    with tuned(settings):
+        return run_episodes(seeds, policy, max_steps, level_dir)
+
+def run(episodes, policy='scripted', max_steps=SIM_RATE * 180, level_dir=None,
+        workers=None, batch=32, seed=0, settings=(), progress=None):
+    """Outcomes of `episodes` episodes, seeds seed..seed+episodes-1, over worker processes"""
+    seeds = list(range(seed, seed + episodes))
+    jobs = [(seeds[i:i + batch], policy, max_steps, level_dir, list(settings))
+            for i in range(0, episodes, batch)]
+    results = []
+    if workers == 1:
+        for j in jobs:
+            results += _shard(j)
+            if progress: progress(len(results) / episodes)
+        return results
+    with ProcessPoolExecutor(workers) as ex:
+        for out in ex.map(_shard, jobs):
+            results += out
+            if progress: progress(len(results) / episodes)
+    return results
+
+def summarize(results):
+    """Outcome statistics over episodes"""
+    score = np.array([r['score'] for r in results])
+    lost = np.array([r['lives_lost'] for r in results])
+    clear = np.array([r['steps'] for r in results if r['cleared']]) / SIM_RATE
+    stats = dict(episodes=len(results), clear_rate=len(clear) / len(results),
+                 score_mean=float(score.mean()), score_p10=float(np.percentile(score, 10)),
+                 score_p90=float(np.percentile(score, 90)), lives_lost_mean=float(lost.mean()),
+                 levels=np.bincount([r['level'] for r in results], minlength=4)[1:].tolist())
+    if len(clear):
+        stats.update(clear_s_mean=float(clear.mean()), clear_s_p50=float(np.median(clear)),
+                     clear_s_min=float(clear.min()))
+    return stats
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Simulate many Forest Guardian games without a window')
+    ap.add_argument('--episodes', type=int, default=256)
+    ap.add_argument('--policy', choices=list(POLICIES), default='scripted')
+    ap.add_argument('--max-seconds', type=float, default=180, help='game time before an episode is cut off')
+    ap.add_argument('--levels', metavar='DIR', help='directory with level1..3.fgl')
+    ap.add_argument('--workers', type=int, help='processes (default: one per core)')
+    ap.add_argument('--batch', type=int, default=32, help='worlds stepped together per process')
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                    help='override a constant, e.g. Enemies.SPEED=3, Enemies.HEALTH=(60,200), '
+                         'Player.LIVES=5 or levels.WOLVES_PER_LEVEL=4')
+    ap.add_argument('--write-replay', metavar='FILE', help='save the first episode as a replay')
+    args = ap.parse_args(argv)
+
+    max_steps = round(args.max_seconds * SIM_RATE)
+    try:
+        parse_settings(args.set)
+    except ValueError as e:
+        ap.error(str(e))
+    show = lambda f: print(f'\r{int(f*100)}%', end='', flush=True)
+    t0 = time.perf_counter()
+    results = run(args.episodes, args.policy, max_steps, args.levels, args.workers,
+                  args.batch, args.seed, args.set, show)
+    took = time.perf_counter() - t0
+    simulated = sum(r['steps'] for r in results) / SIM_RATE
+    print(f'\r{len(results)} episodes in {took:.1f} s, {simulated / took:.0f}x real time')
+    for k, v in summarize(results).items():
+        print(f'{k:<16}{v:.2f}' if isinstance(v, float) else f'{k:<16}{v}')
+    if args.write_replay:
+        r = results[0]
+        replay.save(args.write_replay, controls(args.policy, r['seed'], max_steps)[:r['steps']], SIM_RATE)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import pygame
+
+# -------------------------
+# Broadphase for collisions: a uniform grid hashed by cell
+# -------------------------
+# Every sprite is filed under the cells its rect overlaps, and a query only
+# looks at the sprites in the cells under the query rect, then does the exact
+# rect test. Platforms and health packs are filed once when their chunk
+# streams in and never move, so there is no refiling. Column indices wrap
+# around the level width, which keeps anything placed just past an edge in
+# a bounded set of cells. Enemies and bullets are not in here: they are
+# arrays in entities.py and get tested in bulk.
+
+CELL = 128
+
+class SpatialHash:
+    def __init__(self, width, cell=CELL):
+        self.cell = cell
+        self.cols = max(1, -(-width // cell))
+        self.buckets = {}
+        self.where = {}   # sprite -> (x0, x1, y0, y1) cell range it is filed under
+
+    def _range(self, rect):
+        c = self.cell
+        return rect.left // c, (rect.right - 1) // c, rect.top // c, (rect.bottom - 1) // c
+
+    def _keys(self, r):
+        x0, x1, y0, y1 = r
+        if x1 - x0 + 1 >= self.cols:
+            x0, x1 = 0, self.cols - 1
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                yield cx % self.cols, cy
+
+    def insert(self, sprite):
+        r = self.where[sprite] = self._range(sprite.rect)
+        for k in self._keys(r):
+            self.buckets.setdefault(k, {})[sprite] = None
+
+    def remove(self, sprite):
+        r = self.where.pop(sprite, None)
+        if r is None: return
+        for k in self._keys(r):
+            b = self.buckets[k]
+            del b[sprite]
+            if not b: del self.buckets[k]
+
+    def query(self, rect):
+        """Sprites whose rect overlaps `rect`, each once"""
+        found = {}
+        for k in self._keys(self._range(rect)):
+            b = self.buckets.get(k)
+            if b:
+                for s in b:
+                    if s not in found and rect.colliderect(s.rect):
+                        found[s] = None
+        return list(found)
+
+class SpatialGroup(pygame.sprite.Group):
+    """Sprite group that keeps its (unmoving) members in a SpatialHash as they come and go"""
+    def __init__(self, width, *sprites, cell=CELL):
+        self.grid = SpatialHash(width, cell)
+        super().__init__(*sprites)
+
+    def set_width(self, width):
+        """Match a new level width; only while the group is empty"""
+        if self:
+            raise RuntimeError(f'set_width on a group with {len(self)} sprites in it')
+        self.grid = SpatialHash(width, self.grid.cell)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite)
+        self.grid.insert(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.grid.remove(sprite)
+
+    def collide(self, sprite, dokill=False):
+        """Same answer as pygame.sprite.spritecollide, from nearby cells only"""
+        hits = self.grid.query(sprite.rect)
+        if dokill:
+            for s in hits: s.kill()
+        return hits
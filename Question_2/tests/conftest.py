@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# No window or sound device needed; set before pygame is first imported
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+# The game modules import each other by name, as when run from Question_2
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def world():
+    from Q_2_Answer import World
+    w = World(prefetch=False)
+    yield w
+    w.close()
@@ -0,0 +1,52 @@
+import numpy as np
+import pygame
+
+from entities import Enemies, Projectiles, overlapping_pairs, resolve_hits
+
+def random_stores(rng, n_enemies, n_shots):
+    enemies, shots = Enemies(4), Projectiles(4)
+    for x in rng.integers(0, 600, n_enemies):
+        enemies.spawn(int(x), int(rng.integers(0, 100)), is_boss=bool(rng.random() < 0.2))
+    for x in rng.integers(0, 600, n_shots):
+        shots.spawn(int(x), int(rng.integers(0, 140)), 1)
+    return enemies, shots
+
+def test_sweep_finds_every_overlapping_pair():
+    rng = np.random.default_rng(1)
+    enemies, shots = random_stores(rng, 80, 120)
+    want = [(i, j) for i in range(shots.n) for j in range(enemies.n)
+            if pygame.Rect(*(int(getattr(shots, c)[i]) for c in 'xywh')).colliderect(
+                pygame.Rect(*(int(getattr(enemies, c)[j]) for c in 'xywh')))]
+    i, j = overlapping_pairs(shots, enemies)
+    assert list(zip(i.tolist(), j.tolist())) == want
+
+def test_hits_resolve_like_one_shot_at_a_time():
+    rng = np.random.default_rng(2)
+    enemies, shots = random_stores(rng, 40, 200)
+    # The sprite version: each projectile in spawn order hits the first live enemy it touches
+    health = enemies.health[:enemies.n].copy()
+    alive = np.ones(enemies.n, bool)
+    spent, killed = 0, []
+    for i in range(shots.n):
+        shot = pygame.Rect(int(shots.x[i]), int(shots.y[i]), int(shots.w[i]), int(shots.h[i]))
+        for j in range(enemies.n):
+            if alive[j] and shot.colliderect(pygame.Rect(int(enemies.x[j]), int(enemies.y[j]),
+                                                         int(enemies.w[j]), int(enemies.h[j]))):
+                health[j] -= shots.damage[i]
+                spent += 1
+                if health[j] <= 0:
+                    alive[j] = False
+                    killed.append(bool(enemies.boss[j]))
+                break
+    n_shots = shots.n
+    assert resolve_hits(shots, enemies) == killed
+    assert shots.n == n_shots - spent and enemies.n == alive.sum()
+    assert np.array_equal(enemies.health[:enemies.n], health[alive])
+
+def test_touching_reports_the_first_overlap():
+    enemies = Enemies()
+    enemies.spawn(100, 0)
+    enemies.spawn(10, 0)
+    assert enemies.touching(pygame.Rect(0, 0, 20, 20)) == 1
+    assert enemies.touching(pygame.Rect(0, 0, 200, 20)) == 0
+    assert enemies.touching(pygame.Rect(500, 0, 5, 5)) is None
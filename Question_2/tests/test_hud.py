@@ -0,0 +1,49 @@
+import pygame
+import pytest
+
+from hud import HUD, Text
+
+@pytest.fixture
+def screen():
+    pygame.display.init()
+    pygame.font.init()
+    try:
+        yield pygame.display.set_mode((800, 600))
+    finally:
+        pygame.font.quit()
+        pygame.display.quit()
+
+def test_text_is_rendered_once_per_string(screen):
+    text = Text(keep=3)
+    a = text.render('Score: 0', 30, (0, 0, 0))
+    assert text.render('Score: 0', 30, (0, 0, 0)) is a
+    assert text.render('Score: 0', 31, (0, 0, 0)) is not a
+    assert text.font(30) is text.font(30)
+    text.render('Score: 10', 30, (0, 0, 0))
+    text.render('Score: 20', 30, (0, 0, 0))
+    # Full: the cache starts over rather than growing with every score
+    assert len(text.cache) == 1
+
+def test_overlay_is_rebuilt_only_when_the_state_changes(screen):
+    hud = HUD()
+    hud.draw(screen, 0, 3)
+    overlay = hud.overlay
+    hud.draw(screen, 0, 3)
+    assert hud.overlay is overlay
+    hud.draw(screen, 10, 3)
+    assert hud.overlay is not overlay and hud.pos == (10, 10)
+    hud.draw(screen, 10, 3, boss_alert=True)
+    alert = hud.text.render('Boss incoming!', 50, (255, 0, 0))
+    assert hud.pos == (10, 10) and hud.overlay.get_width() > alert.get_width()
+
+def test_overlay_draws_like_the_separate_texts(screen):
+    hud = HUD()
+    screen.fill((255, 255, 255))
+    hud.draw(screen, 40, 2, boss_alert=True)
+    got = pygame.image.tobytes(screen, 'RGB')
+    screen.fill((255, 255, 255))
+    alert = hud.text.render('Boss incoming!', 50, (255, 0, 0))
+    screen.blit(alert, alert.get_rect(midtop=(400, 10)))
+    screen.blit(hud.text.render('Score: 40', 30, (0, 0, 0)), (10, 10))
+    screen.blit(hud.text.render('Lives: 2', 30, (0, 0, 0)), (10, 40))
+    assert pygame.image.tobytes(screen, 'RGB') == got
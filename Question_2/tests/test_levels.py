@@ -0,0 +1,59 @@
+import numpy as np
+import pygame
+import pytest
+
+import levels
+from spatial import SpatialGroup
+
+def test_level_file_round_trip(tmp_path):
+    recs = levels.builtin(2, 5000, 600)
+    path = str(tmp_path / 'level.fgl')
+    levels.save(path, 5000, recs, chunk=700)
+    data = levels.LevelFile(path)
+    try:
+        world = np.concatenate([data.read(i) for i in range(data.n)])
+        static = recs[(recs['kind'] != levels.ENEMY) & (recs['kind'] != levels.BOSS)]
+        assert data.width == 5000 and data.n == 8
+        assert sorted(world.tolist()) == sorted(static.tolist())
+        assert data.actors.tolist() == recs[recs['kind'] == levels.ENEMY].tolist()
+        data.prefetch(3)
+        assert data.read(3).tolist() == data._read(3).tolist()
+    finally:
+        data.close()
+    with pytest.raises(ValueError):
+        levels.LevelFile(b'XXXX' + bytes(levels.HEADER.size))
+
+def test_picked_up_pack_is_not_killed_again(world):
+    level = world.level
+    chunk = next(i for i in sorted(level.resident) if level.resident[i][1])
+    pack = level.resident[chunk][1][0]
+    level.take(pack)
+    pack.apply(world.player)
+    # Stream the whole level in and out; the pool hands the sprite to other chunks
+    for x in list(range(0, world.level_width, 150)) + list(range(world.level_width, -1, -150)):
+        level.update(x, x + 400)
+    items = [c for _, cs in level.resident.values() for c in cs]
+    assert all(c.alive() for c in items) and len(items) == len(world.collectibles)
+    assert pack.key in level.taken
+    assert sum(1 for _, cs in level.resident.values() for c in cs if c.key == pack.key) == 0
+
+def test_close_drops_reads_not_started(tmp_path):
+    path = str(tmp_path / 'level.fgl')
+    levels.save(path, 5000, levels.builtin(1, 5000, 600), chunk=500)
+    data = levels.LevelFile(path)
+    for i in range(data.n):
+        data.prefetch(i)
+    data.close()
+    assert data.pending == {} and data.f.closed
+
+class Box(pygame.sprite.Sprite):
+    def __init__(self, x, y, w, h):
+        super().__init__()
+        self.rect = pygame.Rect(x, y, w, h)
+
+def test_set_width_needs_an_empty_group():
+    group = SpatialGroup(1000, Box(0, 0, 10, 10))
+    with pytest.raises(RuntimeError):
+        group.set_width(2000)
+    group.empty()
+    group.set_width(2000)
@@ -0,0 +1,68 @@
+import pygame
+import pytest
+
+import Q_2_Answer
+from Q_2_Answer import MAX_STEPS_PER_FRAME, SNAP_DISTANCE, CameraGroup, Game, GameObject
+
+STEP = 1 / 64   # exact in floats, unlike 1 / 60
+
+class Frames:
+    """Controls for Game.run that end after `n` frames, each taking `dt` seconds of a fake clock"""
+    def __init__(self, clock, n, dt):
+        self.clock, self.n, self.dt = clock, n, dt
+
+    def poll(self):
+        self.clock[0] += self.dt
+        self.n -= 1
+        return self.n >= 0
+
+    def next(self):
+        return 0
+
+@pytest.fixture
+def game(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(Q_2_Answer.time, 'perf_counter', lambda: clock[0])
+    monkeypatch.setattr(Q_2_Answer, 'STEP', STEP)
+    g = Game(prefetch=False, headless=True)
+    g.fps = 0   # clock.tick does not wait
+    g.steps, g.alphas = 0, []
+    g.step = lambda bits: setattr(g, 'steps', g.steps + 1)
+    g.draw = g.alphas.append
+    try:
+        yield g, clock
+    finally:
+        g.close()
+        pygame.display.quit()
+
+def test_steps_follow_the_clock_not_the_frames(game):
+    g, clock = game
+    g.run(Frames(clock, 8, 2.5 * STEP))
+    # 20 steps' worth of time in 8 frames; the remainder is drawn as a fraction
+    assert g.steps == 20
+    assert g.alphas == [0.5, 0.0] * 4
+
+def test_a_slow_frame_runs_at_most_the_cap(game):
+    g, clock = game
+    g.run(Frames(clock, 2, 20.25 * STEP))
+    assert g.steps == 2 * MAX_STEPS_PER_FRAME and g.alphas == [0.0, 0.0]
+
+class Screen:
+    def blits(self, batch, doreturn=True):
+        self.batch = batch
+
+def drawn_at(sprite, alpha):
+    group = CameraGroup()
+    group.add(sprite)
+    screen = Screen()
+    group.custom_draw(screen, sprite, alpha)
+    return screen.batch[0][1]
+
+def test_moves_are_interpolated_and_jumps_snap():
+    box = GameObject(100, 100, 10, 10, (0, 0, 0))
+    box.rect.x += 30
+    assert drawn_at(box, 0.5) == (115, 100)
+    assert drawn_at(box, 1.0) == (130, 100)
+    box.prev = box.rect.topleft
+    box.rect.x += SNAP_DISTANCE + 1
+    assert drawn_at(box, 0.5) == (box.rect.x, 100)
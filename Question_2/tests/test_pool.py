@@ -0,0 +1,46 @@
+import numpy as np
+import pygame
+
+from entities import Projectiles
+from pool import Pool
+from Q_2_Answer import GameObject
+
+def test_killed_sprites_are_reused():
+    pool, group = Pool(GameObject), pygame.sprite.Group()
+    a, b = pool.acquire(1, 0, 10, 10, (0, 0, 0)), pool.acquire(2, 0, 10, 10, (0, 0, 0))
+    group.add(a, b)
+    a.kill()
+    a.kill()                        # a second kill must not free it twice
+    c = pool.acquire(3, 4)
+    assert c is a and c.rect.topleft == (3, 4) and c.pool is pool
+    assert pool.stats() == {'in_use': 2, 'free': 0, 'peak': 2, 'created': 2, 'reused': 1}
+
+def test_reclaim_takes_back_what_left_every_group():
+    pool, group = Pool(GameObject), pygame.sprite.Group()
+    group.add(pool.acquire(i, 0, 10, 10, (0, 0, 0)) for i in range(3))
+    kept = pool.acquire(9, 0, 10, 10, (0, 0, 0))
+    pygame.sprite.Group(kept)
+    group.empty()                   # Group.empty does not call kill
+    pool.reclaim()
+    assert pool.stats()['free'] == 3
+    assert kept not in pool.free and pool.acquire(0, 0) in pool.items
+
+def test_store_rows_are_reused_before_growing():
+    shots = Projectiles(capacity=4)
+    for i in range(4):
+        shots.spawn(i, 0, 1)
+    shots.remove(np.array([True, False, True, False]))
+    shots.spawn(10, 0, 1)
+    shots.spawn(11, 0, 1)
+    assert shots.x[:shots.n].tolist() == [1, 3, 10, 11]
+    assert shots.stats() == {'in_use': 4, 'capacity': 4, 'peak': 4,
+                             'spawned': 6, 'freed': 2, 'grows': 0}
+    shots.spawn(12, 0, 1)
+    assert shots.stats()['capacity'] == 8 and shots.stats()['grows'] == 1
+
+def test_world_reports_every_pool(world):
+    stats = world.pool_stats()
+    assert set(stats) == {'platform', 'collectible', 'enemies', 'projectiles'}
+    made = stats['platform']['created']
+    world.reset()
+    assert world.pool_stats()['platform']['created'] == made
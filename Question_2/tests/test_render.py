@@ -0,0 +1,68 @@
+import pygame
+
+from render import StaticLayer
+
+class Block(pygame.sprite.Sprite):
+    def __init__(self, x, y, w, h, color=(0, 200, 0)):
+        super().__init__()
+        self.rect = pygame.Rect(x, y, w, h)
+        self.image = pygame.Surface(self.rect.size)
+        self.image.fill(color)
+
+def test_chunks_are_built_once_and_culled():
+    layer = StaticLayer(chunk=100)
+    layer.add(Block(0, 500, 1000, 40), Block(250, 400, 30, 20))
+    view = pygame.Rect(120, 300, 200, 300)
+    first = layer.visible(view, 120, 300)
+    assert [pos for _, pos in first] == [(-20, 100), (80, 100), (180, 100)]
+    assert sorted(layer.chunks) == [1, 2, 3]
+    again = layer.visible(view, 120, 300)
+    assert [s for s, _ in again] == [s for s, _ in first]
+    assert layer.visible(pygame.Rect(0, 0, 200, 100), 0, 0) == []
+
+def test_add_and_remove_drop_only_overlapped_chunks():
+    layer = StaticLayer(chunk=100)
+    ground = [Block(x, 500, 100, 40) for x in range(0, 1000, 100)]
+    layer.add(*ground)
+    layer.visible(pygame.Rect(0, 0, 1000, 600), 0, 0)
+    kept = dict(layer.chunks)
+    layer.add(Block(430, 500, 40, 20))
+    assert sorted(layer.chunks) == [0, 1, 2, 3, 5, 6, 7, 8, 9]
+    layer.visible(pygame.Rect(0, 0, 1000, 600), 0, 0)
+    layer.remove(ground[7])
+    assert 7 not in layer.chunks and layer.chunks[6] is kept[6]
+    # Chunks are as tall as the layer: growing or shrinking it redraws them all
+    tower = Block(430, 300, 40, 200)
+    layer.add(tower)
+    assert layer.top == 300 and layer.chunks == {}
+    layer.visible(pygame.Rect(0, 0, 1000, 600), 0, 0)
+    layer.remove(tower)
+    assert (layer.left, layer.right, layer.top, layer.bottom) == (0, 1000, 500, 540)
+    assert layer.chunks == {}
+
+def test_removing_an_end_shrinks_the_bounds():
+    layer = StaticLayer(chunk=100)
+    blocks = [Block(x, 500, 100, 40) for x in range(0, 500, 100)]
+    layer.add(*blocks)
+    layer.remove(blocks[0], blocks[-1])
+    assert (layer.left, layer.right) == (100, 400)
+    assert [pos for _, pos in layer.visible(pygame.Rect(0, 0, 600, 600), 0, 0)] == \
+        [(100, 500), (200, 500), (300, 500)]
+    layer.remove(*blocks)
+    assert layer.visible(pygame.Rect(0, 0, 600, 600), 0, 0) == []
+    layer.add(blocks[2])
+    assert (layer.left, layer.right, layer.top, layer.bottom) == (200, 300, 500, 540)
+
+def test_chunk_pixels_match_the_sprites():
+    layer = StaticLayer(chunk=64)
+    a, b = Block(10, 0, 100, 10, (200, 0, 0)), Block(60, 5, 10, 10, (0, 0, 200))
+    layer.add(a, b)
+    layer.remove(a)
+    layer.add(a)
+    screen = pygame.Surface((128, 20))
+    screen.fill((0, 0, 0))
+    screen.blits(layer.visible(pygame.Rect(0, 0, 128, 20), 0, 0))
+    # Re-added sprites paint over the ones already there
+    assert screen.get_at((65, 6))[:3] == (200, 0, 0)
+    assert screen.get_at((65, 12))[:3] == (0, 0, 200)
+    assert screen.get_at((5, 5))[:3] == (0, 0, 0)
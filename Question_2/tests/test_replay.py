@@ -0,0 +1,46 @@
+import pygame
+import pytest
+
+import replay
+import sim
+from Q_2_Answer import SIM_RATE, World
+
+def play(world, steps):
+    for bits in steps:
+        world.step(bits)
+    return (world.score, world.player.lives, world.player.health, world.level_no,
+            world.state, world.player.rect.topleft, len(world.enemies))
+
+def test_same_input_same_game(world):
+    steps = replay.scripted(1500, replay.RIGHT, fire_every=6, jump_every=40).steps
+    first = play(world, steps)
+    world.reset()
+    again = World(prefetch=False)
+    try:
+        assert play(world, steps) == first == play(again, steps)
+    finally:
+        again.close()
+
+def test_replay_file_round_trip(tmp_path, world):
+    steps = sim.controls('random', 7, 900)
+    path = str(tmp_path / 'run.fgr')
+    replay.save(path, steps, SIM_RATE)
+    loaded = replay.Replay.load(path, SIM_RATE)
+    assert len(loaded) == 900
+    assert [loaded.next() for _ in range(900)] == list(steps) and loaded.next() is None
+    with pytest.raises(ValueError, match='steps/s'):
+        replay.Replay.load(path, SIM_RATE * 2)
+
+def test_fire_presses_are_not_merged():
+    pygame.display.init()
+    try:
+        pygame.display.set_mode((8, 8))
+        keys = replay.KeyboardInput()
+        for _ in range(3):
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_f))
+        assert keys.poll()
+        assert [bool(keys.next() & replay.FIRE) for _ in range(4)] == [True, True, True, False]
+        pygame.event.post(pygame.event.Event(pygame.QUIT))
+        assert not replay.Replay(b'').poll()
+    finally:
+        pygame.display.quit()
@@ -0,0 +1,20 @@
+import pytest
+
+import levels
+import sim
+from Q_2_Answer import Player, World
+
+def test_episodes_do_not_depend_on_sharding():
+    one = sim.run(6, 'random', 1200, workers=1, batch=6)
+    split = sim.run_episodes([0, 1, 2], 'random', 1200) + sim.run_episodes([3, 4, 5], 'random', 1200)
+    assert one == split
+
+def test_tuned_settings_are_restored():
+    with sim.tuned(['Player.LIVES=5', 'levels.WOLVES_PER_LEVEL=1', 'Enemies.HEALTH=(10, 20)']):
+        w = World(prefetch=False)
+        assert w.player.lives == 5 and len(w.enemies) == 1
+        w.close()
+    assert Player.LIVES == 3 and levels.WOLVES_PER_LEVEL == 3
+    for bad in ['Player.update=1', 'Nobody.X=1', 'Player.LIVES=five', 'Player.LIVES']:
+        with pytest.raises(ValueError):
+            sim.parse_settings([bad])
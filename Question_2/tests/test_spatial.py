@@ -0,0 +1,28 @@
+import numpy as np
+import pygame
+
+import replay
+from spatial import SpatialGroup
+
+class Box(pygame.sprite.Sprite):
+    def __init__(self, x, y, w, h):
+        super().__init__()
+        self.rect = pygame.Rect(x, y, w, h)
+
+def test_grid_query_matches_brute_force():
+    rng = np.random.default_rng(0)
+    group = SpatialGroup(2000, cell=64)
+    boxes = [Box(*rng.integers(-50, 2000, 2), *rng.integers(1, 300, 2)) for _ in range(300)]
+    group.add(boxes)
+    group.remove(boxes[::3])
+    for _ in range(200):
+        probe = Box(*rng.integers(-100, 2100, 2), *rng.integers(1, 200, 2))
+        want = {b for b in group if probe.rect.colliderect(b.rect)}
+        got = group.collide(probe)
+        assert len(got) == len(want) and set(got) == want
+
+def test_player_does_not_sink_into_platforms(world):
+    steps = [replay.RIGHT | (replay.JUMP if i % 30 == 0 else 0) for i in range(600)]
+    for bits in steps:
+        world.step(bits)
+        assert not world.platforms.collide(world.player) or world.player.vel.y == 0
@@ -0,0 +1,61 @@
+import json
+import threading
+
+import timing
+from timing import Timings
+
+def spans(t, n, name='step'):
+    for _ in range(n):
+        with t.span(name):
+            pass
+
+def test_off_records_nothing():
+    t = Timings()
+    assert t.span('a') is t.span('b')
+    spans(t, 3)
+    assert t.take() == {} and len(t.events) == 0
+
+def test_take_sums_per_phase_and_starts_over():
+    t = Timings(enabled=True)
+    spans(t, 3, 'draw')
+    spans(t, 2, 'flip')
+    took = t.take()
+    assert set(took) == {'draw', 'flip'} and all(v >= 0 for v in took.values())
+    assert t.take() == {}
+
+def test_dump_keeps_the_last_spans_and_counts_the_rest(tmp_path):
+    t = Timings(enabled=True, keep=5)
+    spans(t, 8)
+    path = str(tmp_path / 'trace.json')
+    assert t.dump(path) == 5 and t.dropped == 3
+    with open(path) as f:
+        events = json.load(f)['traceEvents']
+    assert [e['name'] for e in events] == ['step'] * 5
+    assert all(e['ph'] == 'X' and e['dur'] >= 0 for e in events)
+
+def test_stream_writes_every_span_as_valid_json(tmp_path, monkeypatch):
+    monkeypatch.setattr(timing, 'FLUSH_EVERY', 4)
+    t = Timings(enabled=True, keep=3)
+    path = str(tmp_path / 'session.json')
+    t.stream(path)
+    spans(t, 10)
+    worker = threading.Thread(target=spans, args=(t, 5, 'load'))
+    worker.start()
+    worker.join()
+    # Batches reach the file before close()
+    assert t.written == 12
+    assert t.close() == 15 and t.close() == 0
+    with open(path) as f:
+        trace = json.load(f)
+    names = [e['name'] for e in trace['traceEvents']]
+    assert names == ['step'] * 10 + ['load'] * 5
+    assert len({e['tid'] for e in trace['traceEvents']}) == 2
+    assert t.dropped == 12          # the kept events are bounded, the stream is not
+
+def test_empty_stream_is_valid_json(tmp_path):
+    t = Timings(enabled=True)
+    path = str(tmp_path / 'empty.json')
+    t.stream(path)
+    assert t.close() == 0
+    with open(path) as f:
+        assert json.load(f)['traceEvents'] == []
@@ -0,0 +1,97 @@
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+
+# -------------------------
+# Optional timing of the game loop phases
+# -------------------------
+# Every step and frame opens a span per phase (player, enemies, collisions,
+# stream, draw, flip...), so with timing off span() has to be nearly free:
+# it returns one shared nullcontext rather than starting a generator. The
+# profiler overlay (F3) calls take() once per frame for the per-phase sums.
+# The last `keep` spans are also kept as events (`dropped` counts older
+# ones) for dump() (F4). A whole session goes through stream() instead
+# (--trace): spans are written to the file in batches as they come and
+# close() ends it. Both write the Chrome trace format, for chrome://tracing
+# or ui.perfetto.dev.
+
+_OFF = nullcontext()
+FLUSH_EVERY = 4096   # spans buffered before a stream() batch is written
+
+class Timings:
+    def __init__(self, enabled=False, keep=100000):
+        self.enabled = enabled
+        self.totals = defaultdict(float)
+        self.events = deque(maxlen=keep)
+        self.dropped = 0
+        self.t0 = time.perf_counter()
+        self.out = None          # file of a stream() in progress
+        self.unwritten = []
+        self.written = 0
+        self.lock = threading.Lock()
+
+    def span(self, name):
+        return self._span(name) if self.enabled else _OFF
+
+    @contextmanager
+    def _span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.totals[name] += end - start
+            event = (name, start, end, threading.get_ident())
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append(event)
+            if self.out is not None:
+                with self.lock:
+                    self.unwritten.append(event)
+                    full = len(self.unwritten) >= FLUSH_EVERY
+                if full: self.flush()
+
+    def take(self):
+        """Seconds per phase since the last take()"""
+        t = dict(self.totals)
+        self.totals.clear()
+        return t
+
+    def _trace_events(self, events):
+        return [{'name': n, 'ph': 'X', 'pid': 1, 'tid': tid,
+                 'ts': (s-self.t0)*1e6, 'dur': (e-s)*1e6}
+                for n, s, e, tid in events]
+
+    def dump(self, path):
+        """Write the kept spans; returns how many"""
+        events = self._trace_events(list(self.events))
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return len(events)
+
+    def stream(self, path):
+        """Write every span from now until close() to a trace at path"""
+        self.close()
+        self.out = open(path, 'w')
+        self.out.write('{"displayTimeUnit": "ms", "traceEvents": [\n')
+        self.written = 0
+
+    def flush(self):
+        with self.lock:
+            if self.out is None or not self.unwritten: return
+            for e in self._trace_events(self.unwritten):
+                self.out.write((',\n' if self.written else '') + json.dumps(e))
+                self.written += 1
+            self.unwritten = []
+
+    def close(self):
+        """Finish a stream(); returns the number of spans written"""
+        if self.out is None: return 0
+        self.flush()
+        with self.lock:
+            self.out.write('\n]}\n')
+            self.out.close()
+            self.out = None
+        return self.written